@@ -4,10 +4,8 @@ Active users management script
 Show currently active users and manage sessions
 """
 
-import sqlite3
-import os
-from datetime import datetime, timedelta
 from session_manager import SessionManager
+from db import get_connection
 
 def show_active_users():
     """Display currently active users with detailed session info"""
@@ -92,16 +90,14 @@ def simulate_user_logout(session_token):
 
 def show_all_users_status():
     """Show all users with their online/offline status"""
-    db_path = os.path.join(os.path.dirname(__file__), 'app.db')
-    conn = sqlite3.connect(db_path)
+    conn = get_connection()
     
     cursor = conn.execute('''
         SELECT id, username, first_name, last_name, username, is_online, last_login
-        FROM users ORDER BY is_online DESC, last_login DESC
+        FROM users ORDER BY is_online DESC, last_login DESC, id
     ''')
     
     users = cursor.fetchall()
-    conn.close()
     
     print("📋 ALL USERS STATUS")
     print("=" * 80)
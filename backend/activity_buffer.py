@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Write-behind buffer for session activity in SkillSwapping
+Coalesces last_activity touches in memory by session token and writes them
+in one batched transaction every few seconds instead of once per request
+"""
+
+import atexit
+import os
+import threading
+from datetime import datetime
+from db import DB_PATH, get_connection
+
+FLUSH_INTERVAL_SECONDS = 2.0
+MAX_MERGED_TOKENS = 500  # readers flush instead of merging more pending touches than this
+
+class ActivityBuffer:
+    """Latest pending last_activity per session token, flushed by a background thread"""
+
+    def __init__(self, db_path=None, flush_interval=FLUSH_INTERVAL_SECONDS):
+        self.db_path = db_path or DB_PATH
+        self.flush_interval = flush_interval
+        self._pending = {}  # session token -> latest activity time not yet written
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def touch(self, session_token, when=None):
+        """Record activity for a session; written on the next flush"""
+        when = when or datetime.now()
+        with self._lock:
+            current = self._pending.get(session_token)
+            if current is None or when > current:
+                self._pending[session_token] = when
+        self._ensure_flusher()
+
+    def discard(self, session_token):
+        """Forget pending activity for a session that has ended"""
+        with self._lock:
+            self._pending.pop(session_token, None)
+
+    def pending(self, max_tokens=MAX_MERGED_TOKENS):
+        """Pending touches as {token: timestamp string} for readers to merge with the database"""
+        with self._lock:
+            if len(self._pending) <= max_tokens:
+                return {token: str(when) for token, when in self._pending.items()}
+        # Too many to merge into a query, write them out and read the table as is
+        self.flush()
+        return {}
+
+    def flush(self):
+        """Write every pending touch in one transaction; returns the number of sessions updated"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            try:
+                with get_connection(self.db_path) as conn:
+                    # Never move last_activity backwards if a direct write got there first
+                    conn.executemany('''
+                        UPDATE user_sessions SET last_activity = ?
+                        WHERE session_token = ? AND is_active = 1
+                          AND (last_activity IS NULL OR last_activity < ?)
+                    ''', [(when, token, when) for token, when in batch.items()])
+            except Exception as e:
+                print(f"Error flushing session activity: {e}")
+                # Put the batch back so the next flush retries it
+                with self._lock:
+                    for token, when in batch.items():
+                        if token not in self._pending or when > self._pending[token]:
+                            self._pending[token] = when
+                return 0
+            return len(batch)
+
+    def _ensure_flusher(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            # First touch, or a forked worker that inherited a dead thread
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='activity-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._wakeup.wait(self.flush_interval):
+            self.flush()
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+def get_activity_buffer(db_path=None):
+    """Shared buffer for a database file"""
+    db_path = db_path or DB_PATH
+    with _buffers_lock:
+        if db_path not in _buffers:
+            _buffers[db_path] = ActivityBuffer(db_path)
+        return _buffers[db_path]
+
+def flush_all():
+    """Flush every buffer, e.g. before shutdown"""
+    for buffer in list(_buffers.values()):
+        buffer.flush()
+
+atexit.register(flush_all)
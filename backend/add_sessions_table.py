@@ -6,6 +6,7 @@ Add user sessions table to track active users
 import sqlite3
 import os
 from datetime import datetime
+from schema import ensure_indexes
 
 def add_sessions_table():
     db_path = os.path.join(os.path.dirname(__file__), 'app.db')
@@ -38,6 +39,10 @@ def add_sessions_table():
     except sqlite3.OperationalError:
         print("is_online column already exists")
     
+    # Indexes for the session and online-user queries
+    for name in ensure_indexes(conn):
+        print(f"Created index {name}")
+    
     conn.commit()
     conn.close()
     print("Sessions table created successfully!")
@@ -1,11 +1,22 @@
-from flask import Flask, send_from_directory, request, jsonify
+from flask import Flask, send_from_directory, request, jsonify, g
 
+import mimetypes
 import os
-import sqlite3
+import time
+from urllib.parse import urlencode
 from flask_cors import CORS
+from werkzeug.security import safe_join
 from secure_auth import SecureAuth
+from user_profiles import UserProfileManager
 from input_validator import InputValidator, ValidationError
-from error_handling import handle_error, log_api_call, SecurityLogger
+from error_handling import handle_error, log_api_call, SecurityLogger, ServiceUnavailableError
+from password_hasher import HasherBusyError
+from static_cache import AssetCache, negotiate_encoding
+from db import DB_PATH, get_connection
+from session_expiry import get_expiry_scheduler
+from schema import ensure_schema
+from metrics import REGISTRY, CONTENT_TYPE, observe_request
+from user_queries import parse_user_filters, fetch_user_page, iter_user_batches, ndjson_chunks, json_array_chunks
 
 
 app = Flask(__name__, static_folder='../')
@@ -14,50 +25,76 @@ CORS(app)
 # Initialize security components
 auth = SecureAuth()
 validator = InputValidator()
+profiles = UserProfileManager()
 
-# --- SQLite setup ---
-DB_PATH = os.path.join(os.path.dirname(__file__), 'app.db')
+asset_cache = AssetCache()
+
+MAX_MATCH_LIMIT = 100
 
+# --- SQLite setup ---
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Shared per-thread connection, see db.py
+    return get_connection(DB_PATH)
 
-# Create users table if it doesn't exist
+# Create the tables and their indexes if they don't exist
 
 def init_db():
     with get_db_connection() as conn:
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                first_name TEXT,
-                last_name TEXT,
-                preferred_language TEXT,
-                skills_have TEXT,
-                skills_want TEXT,
-                device_fingerprint TEXT,
-                created_at TEXT,
-                is_online BOOLEAN DEFAULT 0,
-                last_login DATETIME
-            )
-        ''')
+        ensure_schema(conn)
         conn.commit()
 
 init_db()
 
+# Per-route request counts and latency for /metrics
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_request('flask', request.method, route, response.status_code, time.perf_counter() - start)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    return app.response_class(REGISTRY.render(), content_type=CONTENT_TYPE, headers={'Cache-Control': 'no-cache'})
+
 # Serve static files (HTML, CSS, JS)
+def send_cached_asset(directory, filename):
+    """Serve a file from the asset cache, gzip/brotli and 304 negotiated per request"""
+    asset = asset_cache.get(safe_join(directory, filename) or '')
+    if asset is None:
+        # Not cacheable (e.g. too big); the WSGI server's file wrapper can sendfile it
+        return send_from_directory(directory, filename)
+    
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'), asset.variants)
+    body, etag = asset.representation(encoding)
+    if asset.not_modified(request.headers.get('If-None-Match'), request.headers.get('If-Modified-Since'), encoding):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype=mimetypes.guess_type(asset.path)[0] or 'application/octet-stream')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = asset.last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    if asset.variants:
+        response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/')
 def serve_index():
-    return send_from_directory(os.path.join(app.static_folder, 'frontend'), 'index.html')
+    return send_cached_asset(os.path.join(app.static_folder, 'frontend'), 'index.html')
 
 @app.route('/<path:filename>')
 def serve_static(filename):
     # First try to serve from frontend directory
     frontend_path = os.path.join(app.static_folder, 'frontend', filename)
     if os.path.exists(frontend_path):
-        return send_from_directory(os.path.join(app.static_folder, 'frontend'), filename)
+        return send_cached_asset(os.path.join(app.static_folder, 'frontend'), filename)
     # Fallback to root static folder
     return send_from_directory(app.static_folder, filename)
 
@@ -81,17 +118,20 @@ def add_user():
         raise e
     
     # Create user with secure authentication
-    result = auth.create_user(
-        username=validated_data['username'],
-        password=validated_data['password'],  # This will be securely hashed
-        first_name=validated_data['firstName'],
-        last_name=validated_data['lastName'],
-        preferred_language=validated_data['preferredLanguage'],
-        skills_have=','.join(validated_data['skillsHave']),
-        skills_want=','.join(validated_data['skillsWant']),
-        device_fingerprint=validated_data.get('deviceFingerprint', ''),
-        created_at=data.get('createdAt')
-    )
+    try:
+        result = auth.create_user(
+            username=validated_data['username'],
+            password=validated_data['password'],  # This will be securely hashed
+            first_name=validated_data['firstName'],
+            last_name=validated_data['lastName'],
+            preferred_language=validated_data['preferredLanguage'],
+            skills_have=','.join(validated_data['skillsHave']),
+            skills_want=','.join(validated_data['skillsWant']),
+            device_fingerprint=validated_data.get('deviceFingerprint', ''),
+            created_at=data.get('createdAt')
+        )
+    except HasherBusyError as e:
+        raise ServiceUnavailableError(str(e), e.retry_after)
     
     if result['success']:
         SecurityLogger.log_user_created(validated_data['username'], request.remote_addr)
@@ -115,10 +155,13 @@ def login():
         raise e
     
     # Authenticate user with secure password verification
-    result = auth.authenticate_user(
-        username=validated_data['username'],
-        password=validated_data['password']  # Plain password - will be verified against hash
-    )
+    try:
+        result = auth.authenticate_user(
+            username=validated_data['username'],
+            password=validated_data['password']  # Plain password - will be verified against hash
+        )
+    except HasherBusyError as e:
+        raise ServiceUnavailableError(str(e), e.retry_after)
     
     if result['success']:
         SecurityLogger.log_successful_login(validated_data['username'], request.remote_addr)
@@ -133,30 +176,61 @@ def login():
         return jsonify({'error': result['error']}), 401
 
 # Example: Get all users
+USER_LIST_COLUMNS = ('id', 'username', 'first_name', 'last_name', 'preferred_language',
+                     'skills_have', 'skills_want', 'created_at')
+
+def user_to_json(user):
+    user_dict = dict(user)
+    # Convert skills from comma-separated strings to arrays
+    user_dict['skills_have'] = user_dict['skills_have'].split(',') if user_dict['skills_have'] else []
+    user_dict['skills_want'] = user_dict['skills_want'].split(',') if user_dict['skills_want'] else []
+    return user_dict
+
 @app.route('/api/users', methods=['GET'])
 def get_users():
-    with get_db_connection() as conn:
-        users = conn.execute('''
-            SELECT id, username, first_name, last_name, preferred_language, 
-                   skills_have, skills_want, created_at 
-            FROM users
-        ''').fetchall()
-        user_list = []
-        for user in users:
-            user_dict = dict(user)
-            # Convert skills from comma-separated strings to arrays
-            if user_dict['skills_have']:
-                user_dict['skills_have'] = user_dict['skills_have'].split(',')
-            else:
-                user_dict['skills_have'] = []
-            
-            if user_dict['skills_want']:
-                user_dict['skills_want'] = user_dict['skills_want'].split(',')
-            else:
-                user_dict['skills_want'] = []
-                
-            user_list.append(user_dict)
-        return jsonify(user_list)
+    # ?limit=&after_id= pages in id order; is_online, skill, wants and language filter in SQL
+    try:
+        filters = parse_user_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    conn = get_db_connection()
+    if request.args.get('format') == 'ndjson':
+        # Export: rows go out as they're read, one JSON object per line
+        return app.response_class(ndjson_chunks(iter_user_batches(conn, USER_LIST_COLUMNS, **filters), user_to_json),
+                                  mimetype='application/x-ndjson')
+    
+    limit = filters.pop('limit', None)
+    if limit is None:
+        # No page size: the whole (filtered) list, serialized batch by batch
+        return app.response_class(json_array_chunks(iter_user_batches(conn, USER_LIST_COLUMNS, **filters), user_to_json),
+                                  mimetype='application/json')
+    
+    users, next_after_id = fetch_user_page(conn, USER_LIST_COLUMNS, limit, **filters)
+    response = jsonify([user_to_json(user) for user in users])
+    if next_after_id is not None:
+        response.headers['X-Next-After-Id'] = str(next_after_id)
+        next_args = request.args.to_dict()
+        next_args['after_id'] = next_after_id
+        response.headers['Link'] = f'<{request.path}?{urlencode(next_args)}>; rel="next"'
+    return response
+
+# Ranked matches for one user
+@app.route('/api/users/<int:user_id>/matches', methods=['GET'])
+@handle_error
+@log_api_call
+def get_user_matches(user_id):
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= MAX_MATCH_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {MAX_MATCH_LIMIT}'}), 400
+    
+    if not profiles.get_user_profile(user_id):
+        return jsonify({'error': 'User not found'}), 404
+    
+    return jsonify({'user_id': user_id, 'matches': profiles.get_top_matches(user_id, limit)})
 
 # Get user count
 @app.route('/api/users/count', methods=['GET'])
@@ -172,4 +246,5 @@ def hello_api():
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5001))
+    get_expiry_scheduler(DB_PATH).start()
     app.run(host='0.0.0.0', port=port, debug=True)
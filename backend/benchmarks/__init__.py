@@ -0,0 +1,4 @@
+"""
+Benchmarks for SkillSwapping
+Run from the backend directory, e.g. python -m benchmarks.rate_limiter_bench
+"""
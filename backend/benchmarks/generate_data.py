@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Synthetic SkillSwapping database generator
+Fills a fresh app.db-compatible database with N users drawn from a seeded
+random source: Zipf-skewed skill popularity with spelling variants (so fuzzy
+matching has work to do), weighted language mixes, a share of online users
+and a history of past sessions
+
+    python -m benchmarks.generate_data --users 10000 --out bench.db [--seed 42]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from match_users import skill_keywords
+from skill_store import ensure_skill_tables
+from schema import ensure_indexes
+
+# Canonical skill -> spellings users actually type
+SKILL_VARIANTS = {
+    'Python': ['Python', 'python programming', 'Python 3', 'python'],
+    'JavaScript': ['JavaScript', 'javascript', 'JS', 'Javascript ES6'],
+    'TypeScript': ['TypeScript', 'typescript'],
+    'Java': ['Java', 'java programming'],
+    'C++': ['C++', 'cpp'],
+    'C#': ['C#', 'csharp'],
+    'Go': ['Go', 'Golang'],
+    'Rust': ['Rust'],
+    'SQL': ['SQL', 'sql queries', 'PostgreSQL', 'MySQL'],
+    'React': ['React', 'React.js', 'ReactJS'],
+    'React Native': ['React Native'],
+    'Node.js': ['Node.js', 'NodeJS', 'node'],
+    'Docker': ['Docker', 'docker containers'],
+    'Kubernetes': ['Kubernetes', 'k8s'],
+    'AWS': ['AWS', 'Amazon Web Services'],
+    'Machine Learning': ['Machine Learning', 'ML', 'machine learning basics'],
+    'Deep Learning': ['Deep Learning', 'neural networks'],
+    'Data Science': ['Data Science', 'data analysis'],
+    'Statistics': ['Statistics', 'stats'],
+    'Excel': ['Excel', 'Microsoft Excel', 'spreadsheets'],
+    'UI Design': ['UI Design', 'UI/UX', 'UX Design'],
+    'Graphic Design': ['Graphic Design', 'Photoshop', 'Illustrator'],
+    'Photography': ['Photography', 'photo editing'],
+    'Video Editing': ['Video Editing', 'Premiere Pro'],
+    'Public Speaking': ['Public Speaking', 'presentation skills'],
+    'Writing': ['Writing', 'creative writing', 'copywriting'],
+    'Marketing': ['Marketing', 'digital marketing', 'SEO'],
+    'Guitar': ['Guitar', 'acoustic guitar', 'electric guitar'],
+    'Piano': ['Piano', 'keyboard'],
+    'Singing': ['Singing', 'vocals'],
+    'Drawing': ['Drawing', 'sketching'],
+    'Painting': ['Painting', 'watercolor'],
+    'Cooking': ['Cooking', 'baking', 'Indian cooking'],
+    'Yoga': ['Yoga', 'meditation'],
+    'Fitness': ['Fitness', 'weight training'],
+    'Chess': ['Chess'],
+    'Spanish': ['Spanish', 'spanish language'],
+    'French': ['French'],
+    'German': ['German'],
+    'Japanese': ['Japanese'],
+    'Mandarin': ['Mandarin', 'Chinese'],
+    'Hindi': ['Hindi'],
+    'Accounting': ['Accounting', 'bookkeeping'],
+    'Investing': ['Investing', 'stock market'],
+    'Project Management': ['Project Management', 'Agile', 'Scrum'],
+}
+
+# Preferred languages with rough population weights
+LANGUAGES = [('English', 50), ('Spanish', 12), ('Hindi', 10), ('French', 6), ('German', 5),
+             ('Telugu', 5), ('Mandarin', 5), ('Portuguese', 4), ('Japanese', 3)]
+
+FIRST_NAMES = ['Aarav', 'Maya', 'Liam', 'Sofia', 'Noah', 'Priya', 'Mateo', 'Emma', 'Wei', 'Fatima',
+               'Lucas', 'Ananya', 'Hiro', 'Chloe', 'Omar', 'Isabella', 'Ravi', 'Lena', 'Diego', 'Amara']
+LAST_NAMES = ['Reddy', 'Garcia', 'Smith', 'Chen', 'Müller', 'Khan', 'Silva', 'Sato', 'Dubois', 'Patel',
+              'Johnson', 'Rossi', 'Kim', 'Nguyen', 'Okafor', 'Ivanova', 'Lopez', 'Brown', 'Singh', 'Haddad']
+
+# Every generated user logs in with BENCH_PASSWORD (stored at bcrypt cost 4;
+# real hashing would dominate generation time)
+BENCH_PASSWORD = 'benchmark'
+PASSWORD_HASH = '$2b$04$3ru.00qOQIMvyOCxHirmhOBXO8OJIyZp4wl7ekUVaHFlaWRhC7jl6'
+
+def bench_username(index):
+    """Username of the index-th generated user"""
+    return f'user{index}@bench.skillswap'
+
+def _zipf_weights(count, exponent=1.1):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+def create_schema(conn):
+    """The users, user_sessions and skill tables as the app creates them"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            first_name TEXT,
+            last_name TEXT,
+            preferred_language TEXT,
+            skills_have TEXT,
+            skills_want TEXT,
+            device_fingerprint TEXT,
+            created_at TEXT,
+            is_online BOOLEAN DEFAULT 0,
+            last_login DATETIME
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            session_token TEXT UNIQUE NOT NULL,
+            login_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_activity DATETIME DEFAULT CURRENT_TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    ensure_skill_tables(conn)
+
+class UserGenerator:
+    """Seeded source of user rows and their sessions"""
+
+    def __init__(self, seed=42, online_fraction=0.2, max_past_sessions=5, now=None):
+        self.random = random.Random(seed)
+        self.online_fraction = online_fraction
+        self.max_past_sessions = max_past_sessions
+        self.now = now or datetime.now()
+        self.skills = list(SKILL_VARIANTS)
+        self.random.shuffle(self.skills)  # which skills are popular depends on the seed
+        self.skill_weights = _zipf_weights(len(self.skills))
+        self.languages = [name for name, _ in LANGUAGES]
+        self.language_weights = [weight for _, weight in LANGUAGES]
+
+    def _pick_skills(self, count):
+        chosen = []
+        while len(chosen) < count:
+            skill = self.random.choices(self.skills, self.skill_weights)[0]
+            if skill not in chosen:
+                chosen.append(skill)
+        return [self.random.choice(SKILL_VARIANTS[skill]) for skill in chosen]
+
+    def _pick_languages(self):
+        count = self.random.choices((1, 2, 3), (60, 30, 10))[0]
+        picked = []
+        while len(picked) < count:
+            language = self.random.choices(self.languages, self.language_weights)[0]
+            if language not in picked:
+                picked.append(language)
+        return ', '.join(picked)
+
+    def user(self, index):
+        """(user row, session rows) for the index-th user; session rows lack the user id"""
+        created = self.now - timedelta(days=self.random.uniform(1, 365))
+        online = self.random.random() < self.online_fraction
+        sessions = []
+        for number in range(self.random.randint(0, self.max_past_sessions)):
+            login = created + timedelta(days=self.random.uniform(0, (self.now - created).days or 1))
+            sessions.append((f'bench-{index}-{number}', login, login + timedelta(minutes=self.random.randint(1, 120)), 0))
+        if online:
+            login = self.now - timedelta(minutes=self.random.randint(1, 240))
+            sessions.append((f'bench-{index}-live', login, self.now - timedelta(seconds=self.random.randint(0, 240)), 1))
+        last_login = max((session[1] for session in sessions), default=None)
+
+        row = (
+            bench_username(index), PASSWORD_HASH,
+            self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES),
+            self._pick_languages(),
+            ', '.join(self._pick_skills(self.random.randint(1, 5))),
+            ','.join(self._pick_skills(self.random.randint(1, 4))),
+            '', created.isoformat(), int(online), last_login,
+        )
+        return row, sessions
+
+def generate(path, users, seed=42, online_fraction=0.2, batch_size=10000):
+    """Write a new database with `users` users to path; returns counts of what was written"""
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    # Throwaway data: no journal or fsync while loading
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    create_schema(conn)
+
+    # Every spelling gets its normalized skills row up front, so user_skills is a bulk insert
+    skill_ids = {}
+    for variants in SKILL_VARIANTS.values():
+        for variant in variants:
+            for name in sorted(skill_keywords(variant)):
+                if name not in skill_ids:
+                    skill_ids[name] = conn.execute('INSERT INTO skills (name) VALUES (?)', (name,)).lastrowid
+
+    generator = UserGenerator(seed, online_fraction)
+    counts = {'users': 0, 'sessions': 0, 'user_skills': 0}
+    for start in range(0, users, batch_size):
+        user_rows, session_rows, skill_rows = [], [], []
+        for index in range(start, min(start + batch_size, users)):
+            row, sessions = generator.user(index)
+            user_id = index + 1
+            user_rows.append((user_id,) + row)
+            session_rows.extend((user_id,) + session for session in sessions)
+            for skill_type, column in (('have', row[5]), ('want', row[6])):
+                for name in sorted(skill_keywords(column)):
+                    skill_rows.append((user_id, skill_ids[name], skill_type))
+
+        conn.executemany('''
+            INSERT INTO users (id, username, password, first_name, last_name, preferred_language,
+                               skills_have, skills_want, device_fingerprint, created_at, is_online, last_login)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', user_rows)
+        conn.executemany('''
+            INSERT INTO user_sessions (user_id, session_token, login_time, last_activity, is_active)
+            VALUES (?, ?, ?, ?, ?)
+        ''', session_rows)
+        conn.executemany('INSERT INTO user_skills (user_id, skill_id, skill_type) VALUES (?, ?, ?)', skill_rows)
+        conn.commit()
+        counts['users'] += len(user_rows)
+        counts['sessions'] += len(session_rows)
+        counts['user_skills'] += len(skill_rows)
+
+    ensure_indexes(conn)  # after the bulk load, like a production database that has been running a while
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic SkillSwapping database')
+    parser.add_argument('--users', type=int, default=10000, help='number of users (1k to 1M)')
+    parser.add_argument('--out', default='bench.db', help='database file to (re)create')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--online', type=float, default=0.2, help='fraction of users with a live session')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate(args.out, args.users, args.seed, args.online)
+    print(f"✅ Wrote {counts['users']} users, {counts['sessions']} sessions and "
+          f"{counts['user_skills']} user skills to {args.out} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Open-loop HTTP load generator for SkillSwapping
+Sends a weighted mix of logins, signups and /api/dashboard and /api/users
+polls at Poisson-distributed arrival times, whatever the server's speed, and
+measures each request from when it was scheduled (not when a connection
+freed up) so a stalled server shows up in the tail instead of being hidden
+by coordinated omission. Timeouts and dropped connections count in the
+percentiles at the time they failed, so a server can't improve its tail by
+not answering. Standard library only (asyncio streams)
+
+    python -m benchmarks.loadgen --target simple_server --rate 200 --duration 30 --json load.json
+    python -m benchmarks.loadgen --target flask --url http://127.0.0.1:5001 --compare load.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import secrets
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from urllib.parse import urlparse
+from benchmarks.generate_data import BENCH_PASSWORD, bench_username
+from benchmarks.run import git_commit
+
+# Default URL, request mix (relative weights) and where login accounts come from per server.
+# simple_server registration stores passwords unhashed, so logins there use generated users
+TARGETS = {
+    'simple_server': {'url': 'http://127.0.0.1:8001', 'accounts': 'generated',
+                      'mix': {'login': 10, 'signup': 5, 'dashboard': 50, 'users': 35}},
+    'flask': {'url': 'http://127.0.0.1:5001', 'accounts': 'signup',
+              'mix': {'login': 10, 'signup': 5, 'users': 85}},
+}
+
+SIGNUP_PASSWORD = 'LoadTest!2345'
+SIGNUP_SKILLS = ['Python', 'JavaScript', 'Guitar', 'Cooking', 'Spanish', 'Photography', 'SQL', 'Design']
+PERCENTILES = (50, 90, 99, 99.9)
+
+class HTTPConnection:
+    """Minimal keep-alive HTTP/1.1 client connection over asyncio streams"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.reusable = True
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=None, headers=None):
+        """(status, headers, body bytes) for one request"""
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Connection: keep-alive']
+        for name, value in (headers or {}).items():
+            lines.append(f'{name}: {value}')
+        payload = b''
+        if body is not None:
+            payload = json.dumps(body).encode()
+            lines.append('Content-Type: application/json')
+        if body is not None or method in ('POST', 'PUT'):
+            lines.append(f'Content-Length: {len(payload)}')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed before the response')
+        version, status = status_line.split()[:2]
+        status = int(status)
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        connection = response_headers.get('connection', '').lower()
+        if connection == 'close' or (version == b'HTTP/1.0' and connection != 'keep-alive'):
+            self.reusable = False
+
+        if method == 'HEAD' or status in (204, 304) or status < 200:
+            data = b''
+        elif 'content-length' in response_headers:
+            data = await self.reader.readexactly(int(response_headers['content-length']))
+        elif response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = await self._read_chunked()
+        else:
+            data = await self.reader.read()  # delimited by the server closing
+            self.reusable = False
+        return status, response_headers, data
+
+    async def _read_chunked(self):
+        parts = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass  # trailers
+                return b''.join(parts)
+            parts.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+class ConnectionPool:
+    """Up to `size` keep-alive connections; callers wait for one when all are busy"""
+
+    def __init__(self, host, port, size):
+        self.host = host
+        self.port = port
+        self.idle = []
+        self.slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def request(self, method, path, body=None, headers=None):
+        async with self.slots:
+            conn = self.idle.pop() if self.idle else None
+            if conn is None:
+                conn = HTTPConnection(self.host, self.port)
+                await conn.connect()
+                self.opened += 1
+            try:
+                result = await conn.request(method, path, body, headers)
+            except BaseException:
+                conn.close()
+                raise
+            if conn.reusable:
+                self.idle.append(conn)
+            else:
+                conn.close()
+            return result
+
+    def close(self):
+        for conn in self.idle:
+            conn.close()
+        self.idle = []
+
+class Scenarios:
+    """Builds and checks the request behind each mix entry"""
+
+    def __init__(self, pool, accounts, rng, users_path):
+        self.pool = pool
+        self.accounts = accounts  # [(username, password)]
+        self.rng = rng
+        self.users_path = users_path
+        self.run_id = secrets.token_hex(3)
+        self.signups = 0
+        self.dashboard_etag = None  # pollers revalidate like the browser does
+
+    async def login(self):
+        username, password = self.rng.choice(self.accounts)
+        status, _, _ = await self.pool.request('POST', '/api/login', {'username': username, 'password': password})
+        return status
+
+    async def signup(self):
+        self.signups += 1
+        status, _, _ = await self.pool.request('POST', '/api/users', signup_body(f'load{self.run_id}x{self.signups}', self.rng))
+        return status
+
+    async def dashboard(self):
+        headers = {'If-None-Match': self.dashboard_etag} if self.dashboard_etag else None
+        status, response_headers, _ = await self.pool.request('GET', '/api/dashboard', headers=headers)
+        self.dashboard_etag = response_headers.get('etag', self.dashboard_etag)
+        return status
+
+    async def users(self):
+        status, _, _ = await self.pool.request('GET', self.users_path)
+        return status
+
+def signup_body(name, rng):
+    return {
+        'username': f'{name}@loadtest.skillswap',
+        'password': SIGNUP_PASSWORD,
+        'firstName': 'Load',
+        'lastName': 'Tester',
+        'preferredLanguage': 'English',
+        'skillsHave': rng.sample(SIGNUP_SKILLS, 2),
+        'skillsWant': rng.sample(SIGNUP_SKILLS, 2),
+    }
+
+async def signup_accounts(pool, count, rng):
+    """Create login accounts before the measured run"""
+    prefix = f'loadacct{secrets.token_hex(3)}x'
+    accounts = []
+    for index in range(count):
+        body = signup_body(f'{prefix}{index}', rng)
+        status, _, data = await pool.request('POST', '/api/users', body)
+        if status != 200:
+            raise RuntimeError(f'signup for login accounts failed with {status}: {data[:200]!r}')
+        accounts.append((body['username'], body['password']))
+    return accounts
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+def summarize(latencies, ok, errors, duration):
+    """Counts, rates and latency percentiles (ms) for one scenario or the whole run
+
+    latencies holds every request, failed ones included, from its scheduled
+    send time to its outcome; ok counts the successful ones
+    """
+    latencies = sorted(latencies)
+    error_count = sum(errors.values())
+    total = len(latencies)
+    summary = {
+        'requests': total,
+        'ok': ok,
+        'errors': error_count,
+        'error_rate': round(error_count / total, 4) if total else 0.0,
+        'throughput_rps': round(ok / duration, 2),
+        'errors_by_kind': dict(errors),
+    }
+    for pct in PERCENTILES:
+        value = percentile(latencies, pct)
+        summary[f'p{pct:g}_ms'] = round(value * 1000, 3) if value is not None else None
+    summary['max_ms'] = round(latencies[-1] * 1000, 3) if latencies else None
+    return summary
+
+async def run_load(args, target):
+    """Drive the open-loop schedule; returns the report dict"""
+    url = urlparse(args.url or target['url'])
+    mix = parse_mix(args.mix) if args.mix else target['mix']
+    rng = random.Random(args.seed)
+    pool = ConnectionPool(url.hostname, url.port or 80, args.max_connections)
+
+    if 'login' in mix:
+        if (args.accounts or target['accounts']) == 'generated':
+            accounts = [(bench_username(index), BENCH_PASSWORD) for index in range(args.account_count)]
+        else:
+            accounts = await signup_accounts(pool, args.account_count, rng)
+    else:
+        accounts = []
+    scenarios = Scenarios(pool, accounts, rng, args.users_path)
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = defaultdict(list)
+    ok = Counter()
+    errors = defaultdict(Counter)
+
+    async def issue(name, scheduled):
+        # Latency runs from the scheduled send time: time spent waiting for a
+        # connection behind slow requests counts against the server. Failures
+        # are recorded too, a timeout at no less than args.timeout, so the
+        # slowest requests never drop out of the tail
+        try:
+            status = await asyncio.wait_for(getattr(scenarios, name)(), args.timeout)
+        except asyncio.TimeoutError:
+            errors[name]['timeout'] += 1
+            latencies[name].append(max(loop.time() - scheduled, args.timeout))
+            return
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            errors[name][type(e).__name__] += 1
+            latencies[name].append(loop.time() - scheduled)
+            return
+        latencies[name].append(loop.time() - scheduled)
+        if 200 <= status < 400:
+            ok[name] += 1
+        else:
+            errors[name][str(status)] += 1
+
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    started = loop.time()
+    scheduled = started
+    while True:
+        scheduled += rng.expovariate(args.rate)
+        if scheduled - started >= args.duration:
+            break
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name = rng.choices(names, weights)[0]
+        task = asyncio.create_task(issue(name, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.wait(set(tasks))  # each one gives up after args.timeout
+    elapsed = loop.time() - started
+    pool.close()
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    all_errors = Counter()
+    for counter in errors.values():
+        all_errors.update(counter)
+    return {
+        'meta': {
+            'target': args.target,
+            'url': f'{url.scheme}://{url.netloc}',
+            'rate': args.rate,
+            'duration': args.duration,
+            'mix': mix,
+            'max_connections': args.max_connections,
+            'connections_opened': pool.opened,
+            'seed': args.seed,
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+        },
+        'overall': summarize(all_latencies, sum(ok.values()), all_errors, elapsed),
+        'scenarios': {name: summarize(latencies[name], ok[name], errors[name], elapsed) for name in names},
+    }
+
+def parse_mix(value):
+    """'login=10,users=90' -> {'login': 10, 'users': 90}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ('login', 'signup', 'dashboard', 'users'):
+            raise argparse.ArgumentTypeError(f'unknown scenario {name!r}')
+        mix[name] = float(weight or 1)
+    return mix
+
+def print_report(report):
+    meta = report['meta']
+    print(f"\n🏁 {meta['url']} at {meta['rate']} req/s for {meta['duration']}s "
+          f"({meta['connections_opened']} connections opened)")
+    print(f"   {'scenario':10} {'requests':>8} {'ok rps':>8} {'err %':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'max':>9}  "
+          f"(ms, failed requests included)")
+    rows = list(report['scenarios'].items()) + [('overall', report['overall'])]
+    for name, s in rows:
+        cells = [f"{s[key]:>9.1f}" if s[key] is not None else f"{'-':>9}"
+                 for key in ('p50_ms', 'p90_ms', 'p99_ms', 'p99.9_ms', 'max_ms')]
+        print(f"   {name:10} {s['requests']:>8} {s['throughput_rps']:>8} {s['error_rate'] * 100:>6.1f} {' '.join(cells)}")
+        if s['errors_by_kind']:
+            print(f"   {'':10} errors: {s['errors_by_kind']}")
+
+def compare(report, baseline_path):
+    """Print p50/p99 and error rate per scenario against an earlier --json run"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n📊 Compared with {baseline_path} ({baseline['meta'].get('commit')})")
+    for name, now in list(report['scenarios'].items()) + [('overall', report['overall'])]:
+        before = baseline['overall'] if name == 'overall' else baseline['scenarios'].get(name)
+        if not before or before['p99_ms'] is None or now['p99_ms'] is None:
+            continue
+        print(f"   {name:10} p50 {before['p50_ms']:>8.1f} -> {now['p50_ms']:>8.1f} ms   "
+              f"p99 {before['p99_ms']:>8.1f} -> {now['p99_ms']:>8.1f} ms   "
+              f"errors {before['error_rate'] * 100:.1f}% -> {now['error_rate'] * 100:.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop HTTP load test for SkillSwapping')
+    parser.add_argument('--target', choices=sorted(TARGETS), default='simple_server',
+                        help='server being tested; picks the default URL, mix and login accounts')
+    parser.add_argument('--url', help='base URL (default depends on --target)')
+    parser.add_argument('--rate', type=float, default=100, help='mean arrivals per second (Poisson)')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of arrivals')
+    parser.add_argument('--mix', help='weights, e.g. login=10,signup=5,dashboard=50,users=35')
+    parser.add_argument('--users-path', default='/api/users', help='path polled by the users scenario')
+    parser.add_argument('--accounts', choices=['generated', 'signup'],
+                        help='login as benchmarks.generate_data users, or sign up accounts first')
+    parser.add_argument('--account-count', type=int, default=50)
+    parser.add_argument('--max-connections', type=int, default=16,
+                        help='client connection cap; requests beyond it wait for a free connection '
+                             '(and that wait counts in their latency)')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--compare', help='earlier --json report to compare against')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = asyncio.run(run_load(args, TARGETS[args.target]))
+    report['meta']['wall_seconds'] = round(time.perf_counter() - started, 2)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.json}")
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Rate limiter overhead benchmark
+Times allow() per request for the memory and sqlite backends with several
+threads or forked processes hammering one limiter, the way gunicorn workers do
+
+    python -m benchmarks.rate_limiter_bench [--calls 5000] [--keys 1000] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from multiprocessing import get_context
+from rate_limiter import TokenBucketLimiter, SQLiteTokenBucketLimiter
+
+def make(backend, db_path):
+    if backend == 'memory':
+        return TokenBucketLimiter()
+    return SQLiteTokenBucketLimiter('bench', db_path=db_path)
+
+def hammer(limiter, calls, keys, seed):
+    """Per-call latencies in seconds for `calls` allow() calls spread over `keys` keys"""
+    latencies = []
+    for i in range(calls):
+        key = f'10.0.{seed}.{(i * 7919 + seed) % keys}'
+        start = time.perf_counter()
+        limiter.allow(key, 100, 900)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def _process_worker(backend, db_path, calls, keys, seed, queue):
+    queue.put(hammer(make(backend, db_path), calls, keys, seed))
+
+def run(backend, mode, workers, calls, keys, db_path):
+    """Latency summary for one backend/concurrency combination"""
+    results = []
+    started = time.perf_counter()
+    if mode == 'threads':
+        limiter = make(backend, db_path)
+        threads = [threading.Thread(target=lambda seed=seed: results.append(hammer(limiter, calls, keys, seed)))
+                   for seed in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        # Forked like gunicorn workers: a memory limiter per process, one shared sqlite table
+        ctx = get_context('fork')
+        queue = ctx.Queue()
+        processes = [ctx.Process(target=_process_worker, args=(backend, db_path, calls, keys, seed, queue))
+                     for seed in range(workers)]
+        for process in processes:
+            process.start()
+        results = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for worker in results for latency in worker)
+    return {
+        'backend': backend,
+        'mode': mode,
+        'workers': workers,
+        'calls': len(latencies),
+        'ops_per_sec': round(len(latencies) / elapsed),
+        'mean_us': round(statistics.fmean(latencies) * 1e6, 2),
+        'p50_us': round(latencies[len(latencies) // 2] * 1e6, 2),
+        'p99_us': round(latencies[int(len(latencies) * 0.99)] * 1e6, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Rate limiter overhead per request')
+    parser.add_argument('--calls', type=int, default=5000, help='allow() calls per worker')
+    parser.add_argument('--keys', type=int, default=1000, help='distinct client keys')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--backends', nargs='+', default=['memory', 'sqlite'], choices=['memory', 'sqlite'])
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            for mode in ('threads', 'processes'):
+                for workers in args.workers:
+                    db_path = os.path.join(tmp, f'{backend}-{mode}-{workers}.db')
+                    result = run(backend, mode, workers, args.calls, args.keys, db_path)
+                    results.append(result)
+                    print(f"{backend:7} {mode:9} x{workers:<3} {result['ops_per_sec']:>9} ops/s  "
+                          f"mean {result['mean_us']:>8}µs  p50 {result['p50_us']:>8}µs  p99 {result['p99_us']:>8}µs")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+End-to-end matching benchmarks for SkillSwapping
+Runs each benchmark in its own process against a generated database and
+reports ops/sec, latency and peak RSS, optionally as JSON that a later run
+can be compared against
+
+    python -m benchmarks.run --db bench.db --users 10000 --json results.json
+    python -m benchmarks.run --db bench.db --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Register a setup function returning (callable to time, operations per call)"""
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+# Setup functions run in the worker process, after SKILLSWAPPING_DB is set,
+# so the app modules are imported there rather than at the top of this file
+
+@benchmark('match_users')
+def bench_match_users(args):
+    import match_users
+    return match_users.match_users, 1
+
+@benchmark('match_users_active')
+def bench_match_users_active(args):
+    import match_users
+    return lambda: match_users.match_users(active_only=True), 1
+
+@benchmark('mutual_matches')
+def bench_mutual_matches(args):
+    from user_profiles import UserProfileManager
+    return UserProfileManager().get_mutual_matches, 1
+
+@benchmark('skill_matches_for_user')
+def bench_skill_matches_for_user(args):
+    from db import get_connection
+    from user_profiles import UserProfileManager
+    manager = UserProfileManager()
+    ids = [row[0] for row in get_connection().execute('SELECT id FROM users')]
+    sample = random.Random(args.seed).sample(ids, min(args.sample, len(ids)))
+    def run():
+        for user_id in sample:
+            manager.get_skill_matches_for_user(user_id)
+    return run, len(sample)
+
+def _dashboard_client():
+    # A real threaded simple_server on a free port, driven over one keep-alive connection
+    import http.client
+    import simple_server
+    httpd = simple_server.make_server('threaded', '127.0.0.1', 0, 4)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1])
+    def get():
+        conn.request('GET', '/api/dashboard')
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f'/api/dashboard returned {response.status}')
+    return simple_server, get
+
+@benchmark('serve_api_dashboard')
+def bench_serve_api_dashboard(args):
+    simple_server, get = _dashboard_client()
+    def run():
+        simple_server.change_feed.bump()  # every request sees a change and rebuilds
+        get()
+    return run, 1
+
+@benchmark('serve_api_dashboard_cached')
+def bench_serve_api_dashboard_cached(args):
+    _, get = _dashboard_client()
+    return get, 1
+
+def run_worker(args):
+    """Time one benchmark in this process and write its result to args.result_file"""
+    fn, ops = BENCHMARKS[args.worker](args)
+    start = time.perf_counter()
+    fn()  # first call pays for cold caches and imports
+    cold = time.perf_counter() - start
+
+    runs = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+
+    median = statistics.median(runs)
+    result = {
+        'name': args.worker,
+        'ops_per_call': ops,
+        'repeat': args.repeat,
+        'cold_seconds': round(cold, 6),
+        'min_seconds': round(min(runs), 6),
+        'median_seconds': round(median, 6),
+        'mean_seconds': round(statistics.fmean(runs), 6),
+        'ops_per_sec': round(ops / median, 2) if median else None,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == 'darwin' else 1),
+        'children_peak_rss_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // (1024 if sys.platform == 'darwin' else 1),
+    }
+    with open(args.result_file, 'w') as f:
+        json.dump(result, f)
+
+def run_in_subprocess(name, args):
+    """Result of one benchmark run in a fresh interpreter, so peak RSS is its own"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        result_file = f.name
+    try:
+        command = [sys.executable, '-m', 'benchmarks.run', '--worker', name, '--result-file', result_file,
+                   '--repeat', str(args.repeat), '--sample', str(args.sample), '--seed', str(args.seed)]
+        env = dict(os.environ, SKILLSWAPPING_DB=os.path.abspath(args.db), PYTHONHASHSEED='0')
+        completed = subprocess.run(command, cwd=BACKEND_DIR, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            return {'name': name, 'error': completed.stderr.strip().splitlines()[-1:]}
+        with open(result_file) as f:
+            return json.load(f)
+    finally:
+        os.remove(result_file)
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """Print each benchmark's median against the same benchmark in an earlier JSON run"""
+    with open(baseline_path) as f:
+        baseline = {result['name']: result for result in json.load(f)['results']}
+    print(f"\n📊 Compared with {baseline_path}")
+    for result in results:
+        before = baseline.get(result['name'])
+        if not before or 'error' in before or 'error' in result:
+            continue
+        ratio = before['median_seconds'] / result['median_seconds'] if result['median_seconds'] else float('inf')
+        print(f"   {result['name']:28} {before['median_seconds']:>10.4f}s -> {result['median_seconds']:>10.4f}s  "
+              f"({ratio:.2f}x {'faster' if ratio >= 1 else 'slower'})")
+
+def main():
+    parser = argparse.ArgumentParser(description='SkillSwapping matching benchmarks')
+    parser.add_argument('--db', default='bench.db', help='benchmark database (generated if missing)')
+    parser.add_argument('--users', type=int, default=10000, help='users to generate when --db is missing')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs after one warm-up run')
+    parser.add_argument('--sample', type=int, default=100, help='users per skill_matches_for_user run')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='run just these benchmarks')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--compare', help='earlier --json output to compare against')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    if not os.path.exists(args.db):
+        from benchmarks.generate_data import generate
+        print(f"Generating {args.users} users into {args.db}...")
+        generate(args.db, args.users, args.seed)
+    with sqlite3.connect(args.db) as conn:
+        users = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+    print(f"🏁 Benchmarking against {args.db} ({users} users), {args.repeat} runs each")
+    results = []
+    for name in args.only or list(BENCHMARKS):
+        result = run_in_subprocess(name, args)
+        results.append(result)
+        if 'error' in result:
+            print(f"   ❌ {name:28} failed: {' '.join(result['error'])}")
+        else:
+            print(f"   {name:28} {result['ops_per_sec']:>10} ops/s  median {result['median_seconds']:.4f}s  "
+                  f"cold {result['cold_seconds']:.4f}s  peak RSS {result['peak_rss_kb'] / 1024:.1f} MB")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'db': os.path.abspath(args.db),
+            'users': users,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
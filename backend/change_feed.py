@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Change notifications for SkillSwapping
+A version number that moves whenever users or sessions change, either through
+an explicit bump from this process or a commit seen via PRAGMA data_version
+(which also catches writes made by the Flask app in another process)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from db import DB_PATH
+
+POLL_INTERVAL_SECONDS = 1.0
+
+class ChangeFeed:
+    """Monotonic change version that waiters can block on"""
+
+    def __init__(self, db_path=None, poll_interval=POLL_INTERVAL_SECONDS):
+        self.db_path = db_path or DB_PATH
+        self.poll_interval = poll_interval
+        self._version = 0
+        self._cond = threading.Condition()
+        self._conn = None           # dedicated connection; data_version is per connection
+        self._conn_pid = None
+        self._data_version = None
+
+    @property
+    def version(self):
+        with self._cond:
+            return self._version
+
+    def bump(self):
+        """Record a change made by this process and wake every waiter"""
+        with self._cond:
+            self._version += 1
+            self._cond.notify_all()
+
+    def poll(self):
+        """Current version, after checking the database for commits from other connections"""
+        with self._cond:
+            self._check_database()
+            return self._version
+
+    def wait(self, version, timeout):
+        """Block until the version differs from the given one or the timeout passes; returns the current version"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._check_database()
+                remaining = deadline - time.monotonic()
+                if self._version != version or remaining <= 0:
+                    return self._version
+                self._cond.wait(min(remaining, self.poll_interval))
+
+    def _check_database(self):
+        # Called with the condition held
+        try:
+            if self._conn is None or self._conn_pid != os.getpid():
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn_pid = os.getpid()
+                self._data_version = None
+            data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+        except sqlite3.Error:
+            return
+        if self._data_version is not None and data_version != self._data_version:
+            self._version += 1
+        self._data_version = data_version
+
+# Process-wide feed bumped by session and user writes
+change_feed = ChangeFeed()
+
+def ensure_generations_table(conn):
+    """Create the table of named generation counters if missing"""
+    conn.execute('CREATE TABLE IF NOT EXISTS generations (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+def bump_generation(conn, name):
+    """Advance a named counter inside the caller's transaction
+
+    Unlike the feed, which moves on any commit, a generation only moves when one
+    kind of data changes, so caches of that data survive logins and activity flushes
+    """
+    ensure_generations_table(conn)
+    conn.execute('''
+        INSERT INTO generations (name, value) VALUES (?, 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1
+    ''', (name,))
+
+def read_generation(conn, name):
+    """Current value of a named counter, 0 if it was never bumped"""
+    try:
+        row = conn.execute('SELECT value FROM generations WHERE name = ?', (name,)).fetchone()
+    except sqlite3.OperationalError:
+        return 0  # no generations table yet
+    return row[0] if row else 0
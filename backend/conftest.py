@@ -0,0 +1,12 @@
+"""
+pytest setup for the backend tests
+Points every module at a scratch database before any test or benchmark module
+imports db, since db.DB_PATH is fixed when db is first imported
+"""
+
+import os
+import tempfile
+
+_scratch_dir = tempfile.mkdtemp(prefix='skillswapping-test-')
+os.environ['SKILLSWAPPING_DB'] = os.path.join(_scratch_dir, 'app.db')
+os.environ['LOG_FILE'] = os.path.join(_scratch_dir, 'test.log')
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Versioned snapshot cache for the SkillSwapping dashboard
+Keeps the serialized /api/dashboard payload until the change feed moves, so
+pollers between changes get the same bytes (or a 304) without a rebuild
+"""
+
+import json
+import secrets
+import threading
+from change_feed import change_feed
+
+class DashboardSnapshotCache:
+    """Serialized dashboard bytes tagged with the change version they were built at"""
+
+    def __init__(self, build, feed=change_feed):
+        self.build = build
+        self.feed = feed
+        self.epoch = secrets.token_hex(4)  # versions restart with the process, ETags must not
+        self.rebuilds = 0
+        self._snapshot = None  # (version, etag, body, data)
+        self._build_lock = threading.Lock()
+
+    def get(self):
+        """(etag, body bytes, data) for the current version, rebuilding at most once per change"""
+        version = self.feed.poll()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot[1:]
+
+        # Single flight: concurrent callers wait for one rebuild instead of each running their own
+        with self._build_lock:
+            snapshot = self._snapshot
+            version = self.feed.poll()
+            if snapshot is None or snapshot[0] != version:
+                # Tagged with the version read before building; a change made
+                # mid-build just means the next caller rebuilds again
+                data = self.build()
+                snapshot = (version, f'"{self.epoch}-{version}"', json.dumps(data).encode(), data)
+                self._snapshot = snapshot
+                self.rebuilds += 1
+        return snapshot[1:]
+
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Server-Sent Events fan-out for the SkillSwapping live dashboard
+One background thread rebuilds the dashboard when the change feed moves,
+diffs it against the previous build and pushes only the deltas to every
+connected client socket
+"""
+
+import json
+import secrets
+import threading
+import time
+from collections import deque
+from change_feed import change_feed
+
+HEARTBEAT_SECONDS = 15
+HISTORY_SIZE = 512        # events kept so reconnecting clients can resume
+SEND_TIMEOUT_SECONDS = 2  # clients that can't take a write this fast are dropped
+RETRY_MILLISECONDS = 5000
+
+def format_event(event, data, event_id=None):
+    """Encode one SSE message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+def _match_index(dashboard):
+    index = {}
+    for match in dashboard['matches']['mutual']:
+        index[('mutual', match['user_a']['id'], match['user_b']['id'])] = match
+    for match in dashboard['matches']['one_way']:
+        index[('one_way', match['teacher']['id'], match['student']['id'])] = match
+    return index
+
+def _match_signature(kind, match):
+    # Ignores the embedded user rows, whose last_activity changes on every request
+    if kind == 'mutual':
+        return (match['a_teaches'], match['b_teaches'], match['languages'], bool(match['both_online']))
+    return (match['skills'], match['languages'], bool(match['both_online']))
+
+def diff_dashboard(old, new):
+    """(event, data) deltas that turn one dashboard payload into the next"""
+    events = []
+
+    old_users = {user['id']: user for user in old['users']}
+    new_users = {user['id']: user for user in new['users']}
+    for user_id, user in new_users.items():
+        before = old_users.get(user_id)
+        if before is None:
+            events.append(('user_added', user))
+        elif user['is_online'] and not before['is_online']:
+            events.append(('user_online', user))
+        elif before['is_online'] and not user['is_online']:
+            events.append(('user_offline', {'id': user_id}))
+    for user_id in old_users.keys() - new_users.keys():
+        events.append(('user_removed', {'id': user_id}))
+
+    old_matches = _match_index(old)
+    new_matches = _match_index(new)
+    for key, match in new_matches.items():
+        before = old_matches.get(key)
+        if before is None or _match_signature(key[0], before) != _match_signature(key[0], match):
+            # Clients replace any match with the same kind and key
+            events.append(('match_added', {'kind': key[0], 'key': list(key[1:]), 'match': match}))
+    for key in old_matches.keys() - new_matches.keys():
+        events.append(('match_removed', {'kind': key[0], 'key': list(key[1:])}))
+
+    if old['stats'] != new['stats']:
+        events.append(('stats', new['stats']))
+    return events
+
+class DashboardStreamHub:
+    """Holds SSE client sockets and pushes dashboard deltas to them"""
+
+    def __init__(self, build_snapshot, feed=change_feed, heartbeat_seconds=HEARTBEAT_SECONDS):
+        self.build_snapshot = build_snapshot
+        self.feed = feed
+        self.heartbeat_seconds = heartbeat_seconds
+        self.epoch = secrets.token_hex(4)  # event ids from before a restart never resume
+        self.seq = 0
+        self.snapshot = None
+        self.history = deque(maxlen=HISTORY_SIZE)  # (seq, event, data)
+        self.clients = []
+        self._version = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add_client(self, sock, last_event_id=None):
+        """Take ownership of a client socket: send it a snapshot (or missed events) and then deltas"""
+        self._ensure_thread()
+        sock.settimeout(SEND_TIMEOUT_SECONDS)
+        with self._lock:
+            if not self.clients:
+                # Nobody was listening, so nothing kept the snapshot current
+                self._rebuild()
+
+            payload = f'retry: {RETRY_MILLISECONDS}\n\n'.encode() + self._catch_up(last_event_id)
+            try:
+                sock.sendall(payload)
+            except OSError:
+                sock.close()
+                return False
+            self.clients.append(sock)
+        return True
+
+    def client_count(self):
+        with self._lock:
+            return len(self.clients)
+
+    def _catch_up(self, last_event_id):
+        # Missed events if the client's last id is still in history, else a fresh snapshot
+        try:
+            epoch, seq = last_event_id.split(':')
+            seq = int(seq)
+        except (AttributeError, ValueError):
+            epoch, seq = None, None
+        if epoch == self.epoch and seq is not None and seq <= self.seq:
+            if seq == self.seq:
+                return b''
+            if self.history and self.history[0][0] <= seq + 1:
+                return b''.join(format_event(event, data, self._event_id(event_seq))
+                                for event_seq, event, data in self.history if event_seq > seq)
+        return format_event('snapshot', self.snapshot, self._event_id(self.seq))
+
+    def _event_id(self, seq):
+        return f'{self.epoch}:{seq}'
+
+    def _rebuild(self):
+        # Called with the lock held and no clients connected
+        self._version = self.feed.version
+        self.snapshot = self.build_snapshot()
+        self.history.clear()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='dashboard-stream', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        last_beat = time.monotonic()
+        while True:
+            version = self.feed.wait(self._version, timeout=self.heartbeat_seconds)
+            if version != self._version:
+                self._version = version
+                if self.client_count():
+                    try:
+                        self._publish()
+                    except Exception as e:
+                        print(f"Error publishing dashboard changes: {e}")
+            if time.monotonic() - last_beat >= self.heartbeat_seconds:
+                # Comment line: keeps proxies from idling the stream out and finds dead clients
+                self._broadcast(b': ping\n\n')
+                last_beat = time.monotonic()
+
+    def _publish(self):
+        snapshot = self.build_snapshot()
+        with self._lock:
+            if not self.clients:
+                return
+            events = diff_dashboard(self.snapshot, snapshot)
+            self.snapshot = snapshot
+            payload = []
+            for event, data in events:
+                self.seq += 1
+                self.history.append((self.seq, event, data))
+                payload.append(format_event(event, data, self._event_id(self.seq)))
+            if payload:
+                self._send_all(b''.join(payload))
+
+    def _broadcast(self, payload):
+        with self._lock:
+            self._send_all(payload)
+
+    def _send_all(self, payload):
+        # Called with the lock held so every client sees events in order
+        alive = []
+        for sock in self.clients:
+            try:
+                sock.sendall(payload)
+                alive.append(sock)
+            except OSError:
+                sock.close()
+        self.clients = alive
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite access layer for SkillSwapping
+Keeps one connection per thread (and per process, so forked workers never
+share a handle) with pragmas applied once when the connection is opened
+"""
+
+import os
+import sqlite3
+import threading
+
+# SKILLSWAPPING_DB points everything at another database, e.g. a generated benchmark one
+DB_PATH = os.environ.get('SKILLSWAPPING_DB') or os.path.join(os.path.dirname(__file__), 'app.db')
+
+# Applied once per connection
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',     # readers don't block the writer
+    'PRAGMA synchronous = NORMAL',   # safe with WAL, far fewer fsyncs
+    'PRAGMA cache_size = -16000',    # ~16 MB page cache per connection
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA busy_timeout = 5000',    # wait for the write lock instead of failing
+)
+
+_local = threading.local()
+
+def has_keyword(value, keyword):
+    """SQL has_keyword(column, keyword): keyword is one of the comma-separated entries, case-insensitively"""
+    if not value or not keyword:
+        return 0
+    keyword = keyword.strip().lower()
+    return int(any(item.strip().lower() == keyword for item in value.split(',')))
+
+def get_connection(db_path=None):
+    """Connection for the current thread, opened and configured on first use"""
+    # Rows are sqlite3.Row (index and key access). Wrap writes in `with conn:`
+    # so they commit or roll back; the connection stays open for the next caller.
+    db_path = db_path or DB_PATH
+    if getattr(_local, 'pid', None) != os.getpid():
+        # New thread, or a forked worker that inherited the parent's handles
+        _local.pid = os.getpid()
+        _local.connections = {}
+
+    conn = _local.connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        conn.create_function('has_keyword', 2, has_keyword, deterministic=True)
+        _local.connections[db_path] = conn
+    return conn
+
+def close_connection(db_path=None):
+    """Close the current thread's connection, e.g. when a worker thread exits"""
+    connections = getattr(_local, 'connections', {})
+    conn = connections.pop(db_path or DB_PATH, None)
+    if conn is not None:
+        conn.close()
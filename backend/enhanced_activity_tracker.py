@@ -3,35 +3,27 @@
 Enhanced activity tracking for SkillSwapping
 """
 
-import sqlite3
-import os
 from datetime import datetime, timedelta
-from flask import request, g
+from flask import request
 from functools import wraps
+from db import DB_PATH, get_connection
+from activity_buffer import get_activity_buffer
+from session_expiry import expire_idle_sessions
 
 class ActivityTracker:
     """Enhanced user activity tracking system"""
     
     def __init__(self, db_path=None):
-        self.db_path = db_path or os.path.join(os.path.dirname(__file__), 'app.db')
+        self.db_path = db_path or DB_PATH
+        self.activity = get_activity_buffer(self.db_path)
         self.session_timeout_minutes = 30  # 30 minutes
         self.cleanup_interval_hours = 1    # Clean up every hour
     
     def update_user_activity(self, session_token):
-        """Update user activity timestamp"""
+        """Update user activity timestamp (buffered, written within a few seconds)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Update session activity
-                result = conn.execute('''
-                    UPDATE user_sessions 
-                    SET last_activity = ? 
-                    WHERE session_token = ? AND is_active = 1
-                ''', (datetime.now(), session_token))
-                
-                if result.rowcount > 0:
-                    conn.commit()
-                    return True
-                    
+            self.activity.touch(session_token)
+            return True
         except Exception as e:
             print(f"Error updating activity: {e}")
         return False
@@ -39,22 +31,23 @@ class ActivityTracker:
     def is_user_active(self, user_id):
         """Check if user is currently active (comprehensive check)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
+            with get_connection(self.db_path) as conn:
                 # Check if user has any active sessions within timeout period
                 cutoff_time = datetime.now() - timedelta(minutes=self.session_timeout_minutes)
+                # Buffered touches are newer than anything in the table
+                pending = self.activity.pending()
+                placeholders = ', '.join('?' * len(pending))
                 
-                session = conn.execute('''
+                session = conn.execute(f'''
                     SELECT s.*, u.is_online
                     FROM user_sessions s
                     JOIN users u ON s.user_id = u.id
                     WHERE s.user_id = ? 
                       AND s.is_active = 1 
-                      AND s.last_activity > ?
+                      AND (s.last_activity > ? OR s.session_token IN ({placeholders}))
                     ORDER BY s.last_activity DESC
                     LIMIT 1
-                ''', (user_id, cutoff_time)).fetchone()
+                ''', (user_id, cutoff_time, *pending)).fetchone()
                 
                 return session is not None
                 
@@ -65,9 +58,7 @@ class ActivityTracker:
     def get_active_users_enhanced(self):
         """Get comprehensive list of active users with activity details"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
+            with get_connection(self.db_path) as conn:
                 cutoff_time = datetime.now() - timedelta(minutes=self.session_timeout_minutes)
                 
                 cursor = conn.execute('''
@@ -133,46 +124,12 @@ class ActivityTracker:
     def cleanup_inactive_sessions(self):
         """Clean up inactive sessions and update user status"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cutoff_time = datetime.now() - timedelta(minutes=self.session_timeout_minutes)
-                
-                # Get users whose sessions will be deactivated
-                cursor = conn.execute('''
-                    SELECT DISTINCT user_id 
-                    FROM user_sessions 
-                    WHERE last_activity < ? AND is_active = 1
-                ''', (cutoff_time,))
-                affected_users = [row[0] for row in cursor.fetchall()]
-                
-                # Deactivate expired sessions
-                result = conn.execute('''
-                    UPDATE user_sessions 
-                    SET is_active = 0 
-                    WHERE last_activity < ? AND is_active = 1
-                ''', (cutoff_time,))
-                
-                deactivated_sessions = result.rowcount
-                
-                # Update user online status
-                users_set_offline = 0
-                for user_id in affected_users:
-                    # Check if user has any remaining active sessions
-                    cursor = conn.execute('''
-                        SELECT COUNT(*) FROM user_sessions 
-                        WHERE user_id = ? AND is_active = 1
-                    ''', (user_id,))
-                    
-                    if cursor.fetchone()[0] == 0:
-                        conn.execute('UPDATE users SET is_online = 0 WHERE id = ?', (user_id,))
-                        users_set_offline += 1
-                
-                conn.commit()
-                
-                return {
-                    'deactivated_sessions': deactivated_sessions,
-                    'users_set_offline': users_set_offline,
-                    'cleanup_time': datetime.now().isoformat()
-                }
+            result = expire_idle_sessions(self.db_path, timedelta(minutes=self.session_timeout_minutes))
+            return {
+                'deactivated_sessions': result['deactivated_sessions'],
+                'users_set_offline': result['users_set_offline'],
+                'cleanup_time': datetime.now().isoformat()
+            }
                 
         except Exception as e:
             print(f"Error during cleanup: {e}")
@@ -181,9 +138,7 @@ class ActivityTracker:
     def get_user_activity_summary(self, user_id):
         """Get detailed activity summary for a specific user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
+            with get_connection(self.db_path) as conn:
                 # Get user info
                 user = conn.execute('''
                     SELECT id, username, first_name, last_name, is_online, last_login, created_at
@@ -4,20 +4,37 @@ Error handling and logging utilities for SkillSwapping
 """
 
 import logging
+import re
+import time
 import traceback
+import uuid
 from datetime import datetime
-from flask import jsonify, request
+from flask import jsonify, request, g, has_request_context
 from functools import wraps
+from log_pipeline import setup_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-    handlers=[
-        logging.FileHandler('skillswapping.log'),
-        logging.StreamHandler()
-    ]
-)
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+def get_request_id():
+    """Id of the current request: the client's X-Request-ID if sane, else a new one"""
+    if 'request_id' not in g:
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex[:16]
+    return g.request_id
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records logged during a Flask request with its id, method and path"""
+    def filter(self, record):
+        if has_request_context():
+            if not hasattr(record, 'request_id'):
+                record.request_id = get_request_id()
+            if not hasattr(record, 'path'):
+                record.path = request.path
+                record.method = request.method
+        return True
+
+# Configure logging: queued, written as JSON lines by a background thread (see log_pipeline.py)
+setup_logging(filters=[RequestContextFilter()])
 
 logger = logging.getLogger('skillswapping')
 
@@ -49,6 +66,12 @@ class RateLimitError(SkillSwapError):
     def __init__(self, message="Rate limit exceeded"):
         super().__init__(message, 429, 'RATE_LIMIT_ERROR')
 
+class ServiceUnavailableError(SkillSwapError):
+    """Temporarily overloaded; clients should retry after the given number of seconds"""
+    def __init__(self, message="Service temporarily unavailable", retry_after=None):
+        super().__init__(message, 503, 'SERVICE_UNAVAILABLE')
+        self.retry_after = retry_after
+
 def handle_error(f):
     """Decorator for consistent error handling"""
     @wraps(f)
@@ -57,11 +80,14 @@ def handle_error(f):
             return f(*args, **kwargs)
         except SkillSwapError as e:
             logger.warning(f"Application error: {e.message}")
-            return jsonify({
+            response = jsonify({
                 'error': e.message,
                 'error_code': e.error_code,
                 'timestamp': datetime.now().isoformat()
-            }), e.status_code
+            })
+            if getattr(e, 'retry_after', None):
+                response.headers['Retry-After'] = str(e.retry_after)
+            return response, e.status_code
         except Exception as e:
             logger.error(f"Unexpected error: {str(e)}\n{traceback.format_exc()}")
             return jsonify({
@@ -75,20 +101,23 @@ def log_api_call(f):
     """Decorator to log API calls"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        start_time = datetime.now()
-        
-        # Log request
-        logger.info(f"API Call: {request.method} {request.path} from {request.remote_addr}")
+        start_time = time.perf_counter()
         
+        # One structured line per request, written after the response is known
         try:
             result = f(*args, **kwargs)
-            duration = (datetime.now() - start_time).total_seconds()
-            logger.info(f"API Success: {request.path} completed in {duration:.3f}s")
-            return result
         except Exception as e:
-            duration = (datetime.now() - start_time).total_seconds()
-            logger.error(f"API Error: {request.path} failed in {duration:.3f}s - {str(e)}")
+            duration_ms = round((time.perf_counter() - start_time) * 1000, 2)
+            status = e.status_code if isinstance(e, SkillSwapError) else 500
+            logger.error(f"API Error: {request.method} {request.path} failed in {duration_ms}ms - {str(e)}",
+                         extra={'status': status, 'duration_ms': duration_ms, 'remote_addr': request.remote_addr})
             raise
+        
+        duration_ms = round((time.perf_counter() - start_time) * 1000, 2)
+        status = result[1] if isinstance(result, tuple) and len(result) > 1 else getattr(result, 'status_code', 200)
+        logger.info(f"API Call: {request.method} {request.path} {status} in {duration_ms}ms",
+                    extra={'status': status, 'duration_ms': duration_ms, 'remote_addr': request.remote_addr})
+        return result
     
     return decorated_function
 
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Asynchronous logging pipeline for SkillSwapping
+Request threads only put records on a bounded queue; one listener thread
+formats them and does the file and console writes, so a slow disk never
+stalls a request. Records go to a size-rotated file as JSON lines
+
+Rotation is single-process: RotatingFileHandler renames the file without
+coordinating with other processes, so forked server workers (gunicorn -w N)
+should each get their own LOG_FILE or leave rotation to an external tool
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE = os.environ.get('LOG_FILE', 'skillswapping.log')
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+LOG_QUEUE_POLICY = os.environ.get('LOG_QUEUE_POLICY', 'drop')  # drop: never wait on logging, block: never lose a record
+
+CONSOLE_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_STANDARD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {'message', 'asctime', 'taskName'}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and any extra fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for name, value in record.__dict__.items():
+            if name not in _STANDARD_ATTRS and not name.startswith('_'):
+                entry[name] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler that drops records (counting them) or blocks when the queue is full"""
+
+    def __init__(self, log_queue, policy=LOG_QUEUE_POLICY):
+        super().__init__(log_queue)
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Unknown log queue policy: {policy} (expected drop or block)")
+        self.policy = policy
+        self.dropped = 0
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # Merge args now (they may not survive the trip) but keep the traceback
+        # apart so the JSON formatter can put it in its own field
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if _listener_stale:
+            _start_listener_in_child()
+        if self.policy == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._unreported += 1
+            return
+        if self._unreported:
+            self._report_drops()
+
+    def _report_drops(self):
+        with self._lock:
+            count, self._unreported = self._unreported, 0
+        if count:
+            notice = logging.makeLogRecord({
+                'name': 'skillswapping.logging', 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f'Log queue full: dropped {count} records', 'dropped': count,
+            })
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                with self._lock:
+                    self._unreported += count
+
+_listener = None
+_handler = None
+_handlers = ()
+_listener_stale = False  # forked child that hasn't logged yet, see _reset_in_child
+_setup_lock = threading.Lock()
+
+def setup_logging(log_file=None, level=LOG_LEVEL, queue_size=LOG_QUEUE_SIZE, policy=LOG_QUEUE_POLICY, filters=()):
+    """Route the root logger through the queue (once per process); returns the queue handler"""
+    global _listener, _handler, _handlers
+    with _setup_lock:
+        if _handler is not None:
+            for log_filter in filters:
+                if log_filter not in _handler.filters:
+                    _handler.addFilter(log_filter)
+            return _handler
+
+        file_handler = RotatingFileHandler(log_file or LOG_FILE, maxBytes=LOG_MAX_BYTES,
+                                           backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+        _handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size), policy)
+        for log_filter in filters:
+            _handler.addFilter(log_filter)
+        _handlers = (file_handler, console_handler)
+        _listener = QueueListener(_handler.queue, *_handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+
+        root = logging.getLogger()
+        root.handlers = [_handler]
+        root.setLevel(level)
+        return _handler
+
+def _reset_in_child():
+    # A forked child inherits the queue but not the listener thread. Nothing is
+    # started here: bcrypt and mutual-matching pool workers fork too and never
+    # log, so the listener only comes back on a child's first record
+    global _listener, _listener_stale, _setup_lock
+    _setup_lock = threading.Lock()
+    if _listener is not None:
+        _handler.queue = queue.Queue(maxsize=_handler.queue.maxsize)
+        _handler._lock = threading.Lock()
+        _listener = None
+        _listener_stale = True
+
+os.register_at_fork(after_in_child=_reset_in_child)
+
+def _start_listener_in_child():
+    global _listener, _listener_stale
+    with _setup_lock:
+        if _listener_stale:
+            _listener = QueueListener(_handler.queue, *_handlers, respect_handler_level=True)
+            _listener.start()
+            _listener_stale = False
+
+def quiet_worker_logging():
+    """Process pool initializer: drop the inherited queue handler so the worker never starts a listener"""
+    global _listener_stale
+    _listener_stale = False
+    logging.getLogger().handlers = [logging.NullHandler()]
+
+def stop_logging():
+    """Write out everything still queued and stop the listener thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Materialized teacher -> student match graph for SkillSwapping
+Edges are maintained per user as accounts are created or edited, so the
+dashboard can read matches without comparing every pair of users
+"""
+
+import threading
+from collections import defaultdict
+from match_users import user_skills
+from skill_similarity import substring_similarity
+
+def parse_skill_list(skill_str):
+    """Split a comma-separated skill or language string into normalized entries"""
+    if not skill_str:
+        return []
+    return [s.strip().lower() for s in skill_str.split(',') if s.strip()]
+
+def match_skill_sets(teacher_have, student_want):
+    """Teacher skills that match something the student wants"""
+    matches = []
+    for skill in teacher_have:
+        for want in student_want:
+            if substring_similarity.matches(skill, want, 100):
+                matches.append(skill)
+
+    return sorted(set(matches))  # Remove duplicates, stable order
+
+def matching_skills(teacher_skills, student_wants):
+    """Find matching skills between teacher and student"""
+    if not teacher_skills or not student_wants:
+        return []
+    return match_skill_sets(parse_skill_list(teacher_skills), parse_skill_list(student_wants))
+
+def common_languages(lang1, lang2):
+    """Find common languages between two users"""
+    if not lang1 or not lang2:
+        return []
+    return list(set(parse_skill_list(lang1)) & set(parse_skill_list(lang2)))
+
+class MatchGraph:
+    """Adjacency lists of teacher -> student edges with matched skills and languages"""
+
+    def __init__(self):
+        self.teaches = defaultdict(dict)  # teacher id -> {student id: edge}
+        self.learns = defaultdict(dict)   # student id -> {teacher id: edge}
+        self.have_index = defaultdict(set)  # skill -> ids of users who have it
+        self.want_index = defaultdict(set)  # skill -> ids of users who want it
+        self._users = {}  # user id -> UserSkills the edges were built from
+        self._lock = threading.RLock()
+
+    def sync(self, users):
+        """Update edges for users that are new, edited or gone; unchanged users cost nothing"""
+        with self._lock:
+            seen = set()
+            for user in users:
+                seen.add(user['id'])
+                if self._users.get(user['id']) is not user_skills(user):
+                    self.update_user(user)
+
+            for user_id in [uid for uid in self._users if uid not in seen]:
+                self.remove_user(user_id)
+
+    def update_user(self, user):
+        """Recompute the edges of a single user after a create or profile edit"""
+        user_id = user['id']
+        record = user_skills(user)
+
+        with self._lock:
+            self.remove_user(user_id)
+            self._users[user_id] = record
+
+            for skill in record.have:
+                substring_similarity.add(skill)
+                self.have_index[skill].add(user_id)
+            for skill in record.want:
+                substring_similarity.add(skill)
+                self.want_index[skill].add(user_id)
+
+            # This user as a teacher: anyone wanting a related skill
+            for other_id in self._candidates(user_id, record.have, self.want_index):
+                edge = self._edge(record, self._users[other_id])
+                if edge:
+                    self.teaches[user_id][other_id] = edge
+                    self.learns[other_id][user_id] = edge
+
+            # This user as a student: anyone having a related skill
+            for other_id in self._candidates(user_id, record.want, self.have_index):
+                edge = self._edge(self._users[other_id], record)
+                if edge:
+                    self.teaches[other_id][user_id] = edge
+                    self.learns[user_id][other_id] = edge
+
+    def remove_user(self, user_id):
+        """Drop a user and every edge touching them"""
+        with self._lock:
+            record = self._users.pop(user_id, None)
+            if record is None:
+                return
+
+            for skill in record.have:
+                self.have_index[skill].discard(user_id)
+            for skill in record.want:
+                self.want_index[skill].discard(user_id)
+
+            for student_id in self.teaches.pop(user_id, {}):
+                self.learns[student_id].pop(user_id, None)
+            for teacher_id in self.learns.pop(user_id, {}):
+                self.teaches[teacher_id].pop(user_id, None)
+
+    def students_of(self, user_id):
+        """Edges from this user to everyone they can teach"""
+        with self._lock:
+            return dict(self.teaches.get(user_id, {}))
+
+    def teachers_of(self, user_id):
+        """Edges to this user from everyone they can learn from"""
+        with self._lock:
+            return dict(self.learns.get(user_id, {}))
+
+    def pairs(self, users):
+        """List (user_a, user_b, a_teaches_b, b_teaches_a) for matched pairs in row order"""
+        positions = defaultdict(list)
+        for i, user in enumerate(users):
+            positions[user['id']].append(i)
+
+        with self._lock:
+            pair_keys = set()
+            for teacher_id, students in self.teaches.items():
+                for student_id in students:
+                    for i in positions.get(teacher_id, ()):
+                        for j in positions.get(student_id, ()):
+                            pair_keys.add((min(i, j), max(i, j)))
+
+            pairs = []
+            for i, j in sorted(pair_keys):
+                user_a, user_b = users[i], users[j]
+                pairs.append((user_a, user_b,
+                              self.teaches[user_a['id']].get(user_b['id']),
+                              self.teaches[user_b['id']].get(user_a['id'])))
+            return pairs
+
+    def _candidates(self, user_id, skills, index):
+        candidates = set()
+        for skill in skills:
+            for related in substring_similarity.neighbors(skill, 100):
+                candidates |= index.get(related, set())
+        candidates.discard(user_id)
+        return candidates
+
+    @staticmethod
+    def _edge(teacher, student):
+        skills = match_skill_sets(teacher.have, student.want)
+        languages = teacher.languages & student.languages
+        if skills and languages:
+            return {'skills': skills, 'languages': sorted(languages)}
+        return None
+
+# Process-wide graph shared by the servers and SecureAuth
+match_graph = MatchGraph()
@@ -1,29 +1,33 @@
-from fuzzywuzzy import fuzz
 # match_users.py
 # Simple keyword-based skill matching for SkillSwapping
 
-import sqlite3
-import os
+import sys
+from collections import defaultdict
+from db import get_connection
 from session_manager import SessionManager
+from skill_similarity import fuzzy_similarity
+from metrics import timed
 
 def get_users():
-    db_path = os.path.join(os.path.dirname(__file__), 'app.db')
-    conn = sqlite3.connect(db_path)
+    conn = get_connection()
     cursor = conn.execute('SELECT id, username, first_name, last_name, skills_have, skills_want, preferred_language, is_online FROM users')
     users = [dict(zip([column[0] for column in cursor.description], row)) for row in cursor.fetchall()]
-    conn.close()
     return users
 
 def skill_keywords(skill_str):
     # Split by comma, lowercase, remove empty
     return set([skill.strip().lower() for skill in skill_str.split(',') if skill.strip()])
 
+def skills_match(have, want, threshold=80):
+    # True when two normalized skills are close enough to count as a match
+    return fuzzy_similarity.matches(have, want, threshold)
+
 def fuzzy_skill_match(skills_have, skills_want, threshold=80):
     # Return list of matched skills using fuzzy matching
     matches = []
     for have in skills_have:
         for want in skills_want:
-            if fuzz.partial_ratio(have, want) >= threshold or fuzz.partial_ratio(want, have) >= threshold:
+            if skills_match(have, want, threshold):
                 matches.append(have)
     return matches
 
@@ -31,31 +35,134 @@ def parse_languages(lang_str):
     # Split by comma, lowercase, remove empty
     return set([lang.strip().lower() for lang in lang_str.split(',') if lang.strip()])
 
+def _keyword_list(value):
+    # Same normalization as skill_keywords/parse_languages, interned so repeats share memory
+    return [sys.intern(item.strip().lower()) for item in (value or '').split(',') if item.strip()]
+
+class UserSkills:
+    """Skills and languages of one user row, parsed once"""
+    __slots__ = ('id', 'have', 'want', 'languages', 'signature')
+    
+    def __init__(self, user_id, skills_have, skills_want, preferred_language):
+        self.id = user_id
+        self.have = frozenset(_keyword_list(skills_have))
+        self.want = frozenset(_keyword_list(skills_want))
+        self.languages = frozenset(_keyword_list(preferred_language))
+        self.signature = (skills_have, skills_want, preferred_language)
+
+# user id -> UserSkills, replaced whenever the row's skill fields change
+_user_skills_cache = {}
+
+def user_skills(user):
+    """Cached parsed record for a user row"""
+    signature = (user.get('skills_have', ''), user.get('skills_want', ''), user.get('preferred_language', ''))
+    record = _user_skills_cache.get(user['id'])
+    if record is None or record.signature != signature:
+        record = UserSkills(user['id'], *signature)
+        _user_skills_cache[user['id']] = record
+    return record
+
+def invalidate_user_skills(user_id):
+    """Drop a user's cached record, e.g. after their skills were edited"""
+    _user_skills_cache.pop(user_id, None)
+
+class SkillIndex:
+    """Inverted index from normalized skill tokens to the users who have or want them"""
+    
+    def __init__(self, threshold=80, similarity=fuzzy_similarity):
+        self.threshold = threshold
+        self.similarity = similarity
+        self.have = defaultdict(set)  # skill -> ids of users who can teach it
+        self.want = defaultdict(set)  # skill -> ids of users who want to learn it
+        self._user_skills = {}        # user id -> UserSkills as last indexed
+    
+    def sync(self, users):
+        """Bring the index up to date with the given user rows, touching only changed users"""
+        seen = set()
+        for user in users:
+            seen.add(user['id'])
+            record = user_skills(user)
+            indexed = self._user_skills.get(user['id'])
+            if indexed is None or (indexed.have, indexed.want) != (record.have, record.want):
+                self.remove_user(user['id'])
+                self.add_user(record)
+        
+        for user_id in list(self._user_skills):
+            if user_id not in seen:
+                self.remove_user(user_id)
+    
+    def add_user(self, record):
+        """Index a single user's parsed skills"""
+        self._user_skills[record.id] = record
+        for skill in record.have:
+            self.similarity.add(skill)
+            self.have[skill].add(record.id)
+        for skill in record.want:
+            self.similarity.add(skill)
+            self.want[skill].add(record.id)
+    
+    def remove_user(self, user_id):
+        """Drop a user from every bucket they appear in"""
+        record = self._user_skills.pop(user_id, None)
+        if record is None:
+            return
+        for skill in record.have:
+            self.have[skill].discard(user_id)
+        for skill in record.want:
+            self.want[skill].discard(user_id)
+    
+    def neighbors(self, skill):
+        """Known skills that fuzzy-match the given skill, mapped to their similarity"""
+        return self.similarity.neighbors(skill, self.threshold)
+    
+    def students_for(self, skills_have):
+        """Ids of users who want at least one skill matching the given skills"""
+        candidates = set()
+        for have in skills_have:
+            for want in self.neighbors(have):
+                candidates |= self.want.get(want, set())
+        return candidates
+
+# Shared across calls so only new or edited users need re-indexing
+_skill_index = SkillIndex()
+
+def get_skill_index(users):
+    """Shared skill index, synced with the given user rows"""
+    _skill_index.sync(users)
+    return _skill_index
+
+@timed('match_users')
 def match_users(active_only=False):
     users = get_users()
+    skill_index = get_skill_index(users)
     
     # Filter to active users only if requested
     if active_only:
         users = [user for user in users if user.get('is_online', 0)]
     
+    position = {user['id']: i for i, user in enumerate(users)}
+    
     matches = []
     for a in users:
-        a_have = skill_keywords(a.get('skills_have', ''))
-        a_langs = parse_languages(a.get('preferred_language', ''))
+        a_skills = user_skills(a)
         a_status = "🟢" if a.get('is_online', 0) else "🔴"
         
-        for b in users:
+        # Only users who want something close to what A has can match
+        candidates = sorted(position[user_id] for user_id in skill_index.students_for(a_skills.have)
+                            if user_id in position)
+        
+        for j in candidates:
+            b = users[j]
             if a['id'] == b['id']:
                 continue
-            b_want = skill_keywords(b.get('skills_want', ''))
-            b_langs = parse_languages(b.get('preferred_language', ''))
+            b_skills = user_skills(b)
             b_status = "🟢" if b.get('is_online', 0) else "🔴"
             
             # Match if any language overlaps
-            common_langs = a_langs & b_langs
+            common_langs = a_skills.languages & b_skills.languages
             if common_langs:
                 # Fuzzy match skills
-                matched_skills = fuzzy_skill_match(a_have, b_want)
+                matched_skills = fuzzy_skill_match(a_skills.have, b_skills.want)
                 if matched_skills:
                     matches.append({
                         'have_user': f"{a_status} {a['first_name']} {a['last_name']} ({a['username']})",
@@ -66,6 +173,39 @@ def match_users(active_only=False):
                     })
     return matches
 
+@timed('match_users_exact')
+def match_users_exact(active_only=False):
+    # Exact skill-name matches via the indexed user_skills join instead of the Python pair loop
+    from skill_store import exact_skill_matches
+    
+    users = {user['id']: user for user in get_users()}
+    conn = get_connection()
+    rows = exact_skill_matches(conn, active_only)
+    
+    # Group skill rows into one match per (teacher, student) pair
+    pairs = {}
+    for teacher_id, student_id, skill in rows:
+        pairs.setdefault((teacher_id, student_id), []).append(skill)
+    
+    matches = []
+    for (teacher_id, student_id), matched_skills in pairs.items():
+        a, b = users.get(teacher_id), users.get(student_id)
+        if not a or not b:
+            continue
+        common_langs = user_skills(a).languages & user_skills(b).languages
+        if not common_langs:
+            continue
+        a_status = "🟢" if a.get('is_online', 0) else "🔴"
+        b_status = "🟢" if b.get('is_online', 0) else "🔴"
+        matches.append({
+            'have_user': f"{a_status} {a['first_name']} {a['last_name']} ({a['username']})",
+            'want_user': f"{b_status} {b['first_name']} {b['last_name']} ({b['username']})",
+            'matched_skills': matched_skills,
+            'language': ', '.join(sorted(common_langs)),
+            'both_online': a.get('is_online', 0) and b.get('is_online', 0)
+        })
+    return matches
+
 if __name__ == '__main__':
     import sys
     
@@ -74,9 +214,11 @@ if __name__ == '__main__':
     sm.cleanup_expired_sessions(hours=24)
     
     # Check for command line arguments
-    active_only = len(sys.argv) > 1 and sys.argv[1].lower() == 'active'
+    args = [arg.lower() for arg in sys.argv[1:]]
+    active_only = 'active' in args
     
-    matches = match_users(active_only)
+    # --exact uses the normalized user_skills tables (run migrate_database.py first)
+    matches = match_users_exact(active_only) if '--exact' in args else match_users(active_only)
     
     print(f"🎯 SKILL MATCHES {'(ACTIVE USERS ONLY)' if active_only else '(ALL USERS)'}")
     print("=" * 80)
@@ -104,3 +246,4 @@ if __name__ == '__main__':
         print(f"\n📊 Summary: {len(online_matches)} live matches, {len(offline_matches)} potential matches")
         if active_only:
             print("💡 Use 'python3 match_users.py' to see all matches including offline users")
+        print("💡 Add --exact for exact skill-name matching through the user_skills index")
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+In-process metrics for SkillSwapping
+Counters, gauges and fixed-bucket histograms with labels, rendered in the
+Prometheus text format for /metrics. Recording is a dict lookup, a bisect and
+two additions, so it is cheap enough for every request and every bcrypt or
+matching call. Values are per process
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; spans cache hits through bcrypt and full matching runs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class CounterValue:
+    """One labelled series of a counter"""
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+class GaugeValue:
+    """One labelled series of a gauge; set it, move it, or have it read from a function"""
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set_function(self, function):
+        """Read the value from function() at scrape time"""
+        self.function = function
+
+    def get(self):
+        return self.function() if self.function is not None else self.value
+
+class HistogramValue:
+    """One labelled series of a histogram: a count per bucket plus sum and count"""
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        # Lock-free: under the GIL a lost increment is possible but vanishingly rare
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self):
+        """Context manager observing the seconds spent in its block"""
+        return _Timer(self)
+
+class _Timer:
+    __slots__ = ('series', 'start')
+
+    def __init__(self, series):
+        self.series = series
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.series.observe(time.perf_counter() - self.start)
+        return False
+
+class Metric:
+    """A named metric with zero or more label names; labels(...) picks a series"""
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Series for these label values (positional, in labelnames order), created on first use"""
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                series = self._series.setdefault(tuple(str(v) for v in values), self._new_series())
+                self._series.setdefault(values, series)  # also reachable by the caller's exact tuple
+        return series
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def collect(self):
+        """(label values, series) pairs, one per distinct series"""
+        with self._lock:
+            seen = {}
+            for values, series in self._series.items():
+                seen.setdefault(id(series), (tuple(str(v) for v in values), series))
+            return sorted(seen.values(), key=lambda item: item[0])
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, series in self.collect():
+            lines.extend(self._render_series(list(zip(self.labelnames, values)), series))
+        return lines
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_series(self):
+        return CounterValue()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_series(self, pairs, series):
+        return [f'{self.name}{_format_labels(pairs)} {_format_value(series.value)}']
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def _new_series(self):
+        return GaugeValue()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def set_function(self, function):
+        self.labels().set_function(function)
+
+    def _render_series(self, pairs, series):
+        try:
+            value = series.get()
+        except Exception:
+            value = float('nan')
+        return [f'{self.name}{_format_labels(pairs)} {_format_value(value)}']
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self):
+        return HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_series(self, pairs, series):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), list(series.counts)):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{_format_labels(pairs + [("le", _format_value(float(bound)))])} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(pairs)} {_format_value(series.sum)}')
+        lines.append(f'{self.name}_count{_format_labels(pairs)} {cumulative}')
+        return lines
+
+class Registry:
+    """Named metrics, created once and shared by every module that asks for them"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return ('\n'.join(lines) + '\n').encode()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+REGISTRY = Registry()
+
+# Shared instruments
+HTTP_REQUESTS = REGISTRY.counter(
+    'skillswapping_http_requests_total', 'HTTP requests handled', ('server', 'method', 'route', 'status'))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'skillswapping_http_request_duration_seconds', 'HTTP request latency', ('server', 'method', 'route'))
+OPERATION_SECONDS = REGISTRY.histogram(
+    'skillswapping_operation_seconds', 'Time spent in database, bcrypt and matching operations', ('operation',))
+
+def observe_request(server, method, route, status, seconds):
+    """Record one finished HTTP request"""
+    HTTP_REQUESTS.labels(server, method, route, status).inc()
+    HTTP_REQUEST_SECONDS.labels(server, method, route).observe(seconds)
+
+def timed(operation):
+    """Decorator recording a function's run time under skillswapping_operation_seconds{operation=...}"""
+    series = OPERATION_SECONDS.labels(operation)
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                series.observe(time.perf_counter() - start)
+        return decorated_function
+    return decorator
+
+def time_operation(operation):
+    """Context manager form of timed() for a block inside a function"""
+    return OPERATION_SECONDS.labels(operation).time()
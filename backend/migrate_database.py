@@ -5,6 +5,7 @@ Database migration script to improve schema and add missing constraints
 
 import sqlite3
 import os
+from skill_store import backfill_user_skills
 
 def migrate_database():
     db_path = os.path.join(os.path.dirname(__file__), 'app.db')
@@ -71,7 +72,7 @@ def migrate_database():
                 skill_type TEXT NOT NULL CHECK (skill_type IN ('have', 'want')),
                 proficiency_level INTEGER DEFAULT 1 CHECK (proficiency_level BETWEEN 1 AND 5),
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users_new (id) ON DELETE CASCADE,
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
                 FOREIGN KEY (skill_id) REFERENCES skills (id) ON DELETE CASCADE,
                 UNIQUE (user_id, skill_id, skill_type)
             )
@@ -86,11 +87,19 @@ def migrate_database():
         conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_active ON user_sessions_new (is_active)')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_user_skills_user_id ON user_skills (user_id)')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_user_skills_skill_id ON user_skills (skill_id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_user_skills_type_skill ON user_skills (skill_type, skill_id, user_id)')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_skills_name ON skills (name)')
         
         print("Database schema improved successfully!")
         print("New tables created: users_new, user_sessions_new, skills, user_skills")
         print("Indexes added for better performance")
+    
+    # Backfill on a separate connection: older databases created user_skills
+    # pointing at users_new, which would reject these rows with foreign keys on
+    with sqlite3.connect(db_path) as conn:
+        count = backfill_user_skills(conn)
+        conn.commit()
+        print(f"Backfilled user_skills for {count} users")
 
 if __name__ == '__main__':
     migrate_database()
\ No newline at end of file
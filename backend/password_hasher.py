@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Off-thread bcrypt for SkillSwapping
+Runs hashing and verification in a dedicated process pool with a bounded
+number of pending jobs, so a login storm queues briefly or is turned away
+instead of tying up every request worker
+
+The pool is per server process: under gunicorn each worker gets its own, so
+the default splits the CPUs across WEB_CONCURRENCY workers (at most 4 bcrypt
+processes each) rather than giving every worker a process per core
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from metrics import timed
+from log_pipeline import quiet_worker_logging
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+SERVER_WORKERS = max(int(os.environ.get('WEB_CONCURRENCY', 1)), 1)  # gunicorn's worker count variable
+BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS',
+                                    min(max((os.cpu_count() or 2) // SERVER_WORKERS, 1), 4)))  # 0 hashes inline
+BCRYPT_MAX_PENDING = int(os.environ.get('BCRYPT_MAX_PENDING', max(BCRYPT_WORKERS, 1) * 4))
+BCRYPT_TIMEOUT_SECONDS = 30
+RETRY_AFTER_SECONDS = 2
+
+class HasherBusyError(Exception):
+    """Raised when the bcrypt queue is full; callers should answer 503"""
+    def __init__(self, retry_after=RETRY_AFTER_SECONDS):
+        super().__init__('Password service is busy, please retry shortly')
+        self.retry_after = retry_after
+
+# Run in the worker processes, so they must be importable top-level functions
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+class PasswordHasher:
+    """bcrypt hash/verify on a process pool with backpressure"""
+
+    def __init__(self, workers=BCRYPT_WORKERS, max_pending=BCRYPT_MAX_PENDING, rounds=BCRYPT_ROUNDS):
+        self.workers = workers
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @timed('bcrypt_hash')
+    def hash(self, password):
+        """bcrypt hash of a password at the configured cost"""
+        return self._run(_hashpw, password.encode('utf-8'), self.rounds)
+
+    @timed('bcrypt_verify')
+    def verify(self, password, hashed):
+        """Check a password against its hash"""
+        return self._run(_checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        """True when a stored hash uses a different cost than BCRYPT_ROUNDS"""
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def submit_hash(self, password):
+        """Queue a hash in the background; returns a future, or None if the pool is busy"""
+        try:
+            return self._submit(_hashpw, password.encode('utf-8'), self.rounds)
+        except HasherBusyError:
+            return None
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        future = self._submit(fn, *args)
+        try:
+            return future.result(timeout=BCRYPT_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            # Queue too deep or a worker hung; drop the job if it hasn't started and shed load
+            future.cancel()
+            raise HasherBusyError()
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise HasherBusyError()
+
+    def _submit(self, fn, *args):
+        if self.workers <= 0:
+            raise HasherBusyError()  # no pool to queue background work on
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusyError()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next caller
+            self._slots.release()
+            with self._lock:
+                self._executor = None
+            raise HasherBusyError()
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # First use, or a forked server worker that can't use the parent's pool
+                self._pid = os.getpid()
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=quiet_worker_logging)
+            return self._executor
+
+# Process-wide hasher used by SecureAuth
+password_hasher = PasswordHasher()
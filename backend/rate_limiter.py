@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiting for SkillSwapping
+One (tokens, last refill) pair per key instead of a list of timestamps, with
+idle keys swept out and the key count capped LRU so floods of spoofed
+addresses can't grow memory without bound. Buckets live in process memory
+or, so every gunicorn worker shares them, in a SQLite table
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from db import get_connection
+
+MAX_TRACKED_KEYS = 100000
+SWEEP_INTERVAL_SECONDS = 60
+
+# memory: per process (one worker). sqlite: shared by every process using RATE_LIMIT_DB
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_DB = os.environ.get('RATE_LIMIT_DB', os.path.join(os.path.dirname(__file__), 'rate_limits.db'))
+
+class TokenBucketLimiter:
+    """Per-key token buckets holding up to `capacity` tokens that refill over `period` seconds"""
+
+    def __init__(self, max_keys=MAX_TRACKED_KEYS, sweep_interval=SWEEP_INTERVAL_SECONDS):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self.evicted = 0
+        self._buckets = OrderedDict()  # key -> [tokens, updated], least recently used first
+        self._idle_ttl = 0.0           # longest period seen; a bucket idle this long is full again
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._lock = threading.Lock()
+
+    def allow(self, key, capacity, period, cost=1):
+        """Take cost tokens if the bucket has them; False means the key is over its limit"""
+        with self._lock:
+            bucket = self._refill(key, capacity, period)
+            if bucket[0] < cost:
+                return False
+            bucket[0] -= cost
+            return True
+
+    def consume(self, key, capacity, period, cost=1):
+        """Take cost tokens whether or not they are there (e.g. recording a failed login)"""
+        with self._lock:
+            bucket = self._refill(key, capacity, period)
+            bucket[0] = max(bucket[0] - cost, 0.0)
+
+    def remaining(self, key, capacity, period):
+        """Tokens currently available to a key, without taking any"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return float(capacity)
+            return min(capacity, bucket[0] + (time.monotonic() - bucket[1]) * capacity / period)
+
+    def reset(self, key):
+        """Forget a key, giving it a full bucket"""
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def sweep(self):
+        """Drop buckets idle long enough to have refilled; returns how many were dropped"""
+        with self._lock:
+            return self._sweep(time.monotonic())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._buckets)
+
+    def _refill(self, key, capacity, period):
+        # Called with the lock held
+        now = time.monotonic()
+        self._idle_ttl = max(self._idle_ttl, period)
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(capacity), now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evicted += 1
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * capacity / period)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _sweep(self, now):
+        # Buckets are in last-use order, so the idle ones are all at the front
+        self._next_sweep = now + self.sweep_interval
+        cutoff = now - self._idle_ttl
+        dropped = 0
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if updated > cutoff:
+                break
+            del self._buckets[key]
+            dropped += 1
+        return dropped
+
+class SQLiteTokenBucketLimiter:
+    """TokenBucketLimiter with its buckets in a SQLite table, updated atomically across processes"""
+
+    def __init__(self, scope, db_path=None, max_keys=MAX_TRACKED_KEYS, sweep_interval=SWEEP_INTERVAL_SECONDS):
+        self.scope = scope  # limiters share the table, each under its own scope
+        self.db_path = db_path or RATE_LIMIT_DB
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._idle_ttl = 0.0
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._lock = threading.Lock()
+        with get_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                    scope TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    allowed INTEGER NOT NULL,
+                    PRIMARY KEY (scope, key)
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_rate_limit_buckets_updated ON rate_limit_buckets (scope, updated)')
+
+    def allow(self, key, capacity, period, cost=1):
+        """Take cost tokens if the bucket has them; False means the key is over its limit"""
+        # One statement refills, decides and takes: SET expressions all see the old row,
+        # so `allowed` is computed from the same refilled balance as `tokens`
+        row = self._upsert(key, capacity, period, cost, '''
+            INSERT INTO rate_limit_buckets (scope, key, tokens, updated, allowed)
+            VALUES (:scope, :key, MAX(:capacity - :cost, :capacity * (:capacity < :cost)), :now, :capacity >= :cost)
+            ON CONFLICT (scope, key) DO UPDATE SET
+                tokens = MIN(:capacity, tokens + (:now - updated) * :rate)
+                         - :cost * (MIN(:capacity, tokens + (:now - updated) * :rate) >= :cost),
+                allowed = MIN(:capacity, tokens + (:now - updated) * :rate) >= :cost,
+                updated = :now
+            RETURNING allowed
+        ''')
+        return bool(row[0])
+
+    def consume(self, key, capacity, period, cost=1):
+        """Take cost tokens whether or not they are there (e.g. recording a failed login)"""
+        self._upsert(key, capacity, period, cost, '''
+            INSERT INTO rate_limit_buckets (scope, key, tokens, updated, allowed)
+            VALUES (:scope, :key, MAX(:capacity - :cost, 0), :now, 1)
+            ON CONFLICT (scope, key) DO UPDATE SET
+                tokens = MAX(MIN(:capacity, tokens + (:now - updated) * :rate) - :cost, 0),
+                updated = :now
+            RETURNING tokens
+        ''')
+
+    def remaining(self, key, capacity, period):
+        """Tokens currently available to a key, without taking any"""
+        row = get_connection(self.db_path).execute(
+            'SELECT tokens, updated FROM rate_limit_buckets WHERE scope = ? AND key = ?',
+            (self.scope, str(key))).fetchone()
+        if row is None:
+            return float(capacity)
+        return min(capacity, row[0] + (time.time() - row[1]) * capacity / period)
+
+    def reset(self, key):
+        """Forget a key, giving it a full bucket"""
+        with get_connection(self.db_path) as conn:
+            conn.execute('DELETE FROM rate_limit_buckets WHERE scope = ? AND key = ?', (self.scope, str(key)))
+
+    def sweep(self):
+        """Drop buckets idle long enough to have refilled, then the oldest beyond max_keys"""
+        dropped = 0
+        with get_connection(self.db_path) as conn:
+            if self._idle_ttl:
+                # Other processes' buckets too; they refill at the same periods
+                dropped += conn.execute('DELETE FROM rate_limit_buckets WHERE scope = ? AND updated <= ?',
+                                        (self.scope, time.time() - self._idle_ttl)).rowcount
+            dropped += conn.execute('''
+                DELETE FROM rate_limit_buckets WHERE scope = ? AND updated <= (
+                    SELECT updated FROM rate_limit_buckets WHERE scope = ?
+                    ORDER BY updated DESC LIMIT 1 OFFSET ?
+                )
+            ''', (self.scope, self.scope, self.max_keys)).rowcount
+        return dropped
+
+    def __len__(self):
+        return get_connection(self.db_path).execute(
+            'SELECT COUNT(*) FROM rate_limit_buckets WHERE scope = ?', (self.scope,)).fetchone()[0]
+
+    def _upsert(self, key, capacity, period, cost, sql):
+        with self._lock:
+            self._idle_ttl = max(self._idle_ttl, period)
+            sweep_due = time.monotonic() >= self._next_sweep
+            if sweep_due:
+                self._next_sweep = time.monotonic() + self.sweep_interval
+        if sweep_due:
+            try:
+                self.sweep()
+            except sqlite3.Error as e:
+                print(f"Error sweeping rate limit buckets: {e}")
+
+        # time.time(), not monotonic: the timestamps are compared across processes
+        params = {'scope': self.scope, 'key': str(key), 'capacity': float(capacity), 'cost': float(cost),
+                  'rate': capacity / period, 'now': time.time()}
+        with get_connection(self.db_path) as conn:
+            return conn.execute(sql, params).fetchone()
+
+def make_limiter(scope, backend=None):
+    """Limiter for a scope on the configured backend (RATE_LIMIT_BACKEND)"""
+    backend = backend or RATE_LIMIT_BACKEND
+    if backend == 'memory':
+        return TokenBucketLimiter()
+    if backend == 'sqlite':
+        return SQLiteTokenBucketLimiter(scope)
+    raise ValueError(f"Unknown rate limit backend: {backend} (expected memory or sqlite)")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Schema and index manager for SkillSwapping
+Creates the live users/user_sessions/skill tables and the indexes their hot
+queries need, idempotently, and checks each hot query's EXPLAIN QUERY PLAN so
+a missing index fails CI instead of turning into a full-table scan per request
+
+    python schema.py                      # apply to app.db (or SKILLSWAPPING_DB)
+    python schema.py --check              # plans against a scratch database with the schema
+    python schema.py --check --db bench.db  # plans against real data and statistics
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+from db import DB_PATH, get_connection
+from change_feed import ensure_generations_table
+
+# name -> (table, columns). Trailing columns make the index covering for the
+# queries listed with it, so they never touch the table rows
+INDEXES = {
+    # end_session/is_user_active/login: sessions of one user, active or not;
+    # the dashboard's LEFT JOIN also reads last_activity from here
+    'idx_user_sessions_user_active': ('user_sessions', ('user_id', 'is_active', 'last_activity')),
+    # Expiry sweeps and the active-user lists: active sessions by last_activity
+    'idx_user_sessions_active_activity': ('user_sessions', ('is_active', 'last_activity', 'user_id')),
+    # Online users
+    'idx_users_online': ('users', ('is_online',)),
+}
+
+# (name, SQL, parameters, aliases allowed to be scanned in full). Every query
+# that runs per request, per login or per sweep against users/user_sessions;
+# only queries that return every user may scan users
+HOT_QUERIES = [
+    ('SecureAuth.authenticate_user lookup',
+     'SELECT * FROM users WHERE username = ?', ('user@example.com',), ()),
+    ('SecureAuth.authenticate_user end old sessions',
+     'UPDATE user_sessions SET is_active = 0 WHERE user_id = ? AND is_active = 1', (1,), ()),
+    ('SessionManager.end_session lookup',
+     'SELECT user_id FROM user_sessions WHERE session_token = ? AND is_active = 1', ('token',), ()),
+    ('SessionManager.end_session remaining sessions',
+     'SELECT COUNT(*) FROM user_sessions WHERE user_id = ? AND is_active = 1', (1,), ()),
+    ('SessionManager.get_active_users', '''
+        SELECT u.id, u.username, u.first_name, u.last_name, s.login_time, s.last_activity
+        FROM users u
+        JOIN user_sessions s ON u.id = s.user_id
+        WHERE u.is_online = 1 AND s.is_active = 1
+        ORDER BY s.last_activity DESC
+     ''', (), ()),
+    ('SessionManager.get_recently_active_users', '''
+        SELECT u.id, u.username, s.login_time, s.last_activity, s.session_token
+        FROM users u
+        JOIN user_sessions s ON u.id = s.user_id
+        WHERE u.is_online = 1 AND s.is_active = 1
+        AND (s.last_activity >= ? OR s.session_token IN (?))
+        ORDER BY s.last_activity DESC
+     ''', ('2024-01-01 00:00:00', 'token'), ()),
+    ('SessionManager.is_user_online',
+     'SELECT is_online FROM users WHERE id = ?', (1,), ()),
+    ('ActivityTracker.is_user_active', '''
+        SELECT s.*, u.is_online
+        FROM user_sessions s
+        JOIN users u ON s.user_id = u.id
+        WHERE s.user_id = ? AND s.is_active = 1
+          AND (s.last_activity > ? OR s.session_token IN (?))
+        ORDER BY s.last_activity DESC
+        LIMIT 1
+     ''', (1, '2024-01-01 00:00:00', 'token'), ()),
+    ('ActivityTracker.get_active_users_enhanced', '''
+        SELECT u.id, u.username, s.login_time, s.last_activity, s.session_token
+        FROM users u
+        JOIN user_sessions s ON u.id = s.user_id
+        WHERE s.is_active = 1 AND s.last_activity > ?
+        ORDER BY s.last_activity DESC
+     ''', ('2024-01-01 00:00:00',), ()),
+    ('ActivityTracker.get_user_activity_summary', '''
+        SELECT session_token, login_time, last_activity, is_active
+        FROM user_sessions
+        WHERE user_id = ?
+        ORDER BY last_activity DESC
+        LIMIT 10
+     ''', (1,), ()),
+    ('ActivityBuffer.flush', '''
+        UPDATE user_sessions SET last_activity = ?
+        WHERE session_token = ? AND is_active = 1
+          AND (last_activity IS NULL OR last_activity < ?)
+     ''', ('2024-01-01 00:00:00', 'token', '2024-01-01 00:00:00'), ()),
+    ('session_expiry sessions', '''
+        UPDATE user_sessions SET is_active = 0
+        WHERE is_active = 1 AND last_activity < ?
+        RETURNING user_id, session_token
+     ''', ('2024-01-01 00:00:00',), ()),
+    ('session_expiry users', '''
+        UPDATE users SET is_online = 0
+        WHERE id IN (SELECT value FROM json_each(?))
+          AND is_online = 1
+          AND id NOT IN (SELECT user_id FROM user_sessions WHERE is_active = 1)
+     ''', ('[1, 2]',), ()),
+    ('SessionExpiryScheduler.start',
+     'SELECT session_token, last_activity FROM user_sessions WHERE is_active = 1', (), ()),
+    ('read_generation (UserSnapshot, SessionCache)',
+     'SELECT value FROM generations WHERE name = ?', ('profiles',), ()),
+    ('UserSnapshot.online_ids',
+     'SELECT id FROM users WHERE is_online = 1', (), ()),
+    ('simple_server build_dashboard_data', '''
+        SELECT u.id, u.username, u.first_name, u.last_name, u.preferred_language,
+               u.skills_have, u.skills_want, u.created_at, u.is_online, u.last_login,
+               s.last_activity
+        FROM users u
+        LEFT JOIN user_sessions s ON u.id = s.user_id AND s.is_active = 1
+        ORDER BY u.is_online DESC, s.last_activity DESC, u.id
+     ''', (), ('u',)),
+    ('simple_server /api/users page', '''
+        SELECT u.id, u.username, u.is_online FROM users u
+        WHERE u.id > ? AND COALESCE(u.is_online, 0) = ?
+        ORDER BY u.id LIMIT ?
+     ''', (0, 1, 51), ()),
+]
+
+def ensure_tables(conn):
+    """Create the users, user_sessions and skill tables, and columns older databases lack"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            first_name TEXT,
+            last_name TEXT,
+            preferred_language TEXT,
+            skills_have TEXT,
+            skills_want TEXT,
+            device_fingerprint TEXT,
+            created_at TEXT,
+            is_online BOOLEAN DEFAULT 0,
+            last_login DATETIME
+        )
+    ''')
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(users)')}
+    if 'is_online' not in columns:
+        conn.execute('ALTER TABLE users ADD COLUMN is_online BOOLEAN DEFAULT 0')
+    if 'last_login' not in columns:
+        conn.execute('ALTER TABLE users ADD COLUMN last_login DATETIME')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            session_token TEXT UNIQUE NOT NULL,
+            login_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_activity DATETIME DEFAULT CURRENT_TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    ensure_generations_table(conn)
+    # Imported here: skill_store needs match_users, which imports the session
+    # modules that import this one
+    from skill_store import ensure_skill_tables
+    ensure_skill_tables(conn)
+
+def ensure_indexes(conn):
+    """Create missing indexes and rebuild any whose columns differ; returns the names changed"""
+    changed = []
+    for name, (table, columns) in INDEXES.items():
+        existing = tuple(row[2] for row in conn.execute(f'PRAGMA index_info({name})'))
+        if existing == columns:
+            continue
+        if existing:
+            conn.execute(f'DROP INDEX {name}')
+        conn.execute(f'CREATE INDEX {name} ON {table} ({", ".join(columns)})')
+        changed.append(name)
+    return changed
+
+def ensure_schema(conn):
+    """Tables and indexes; safe to run on every start. Returns the indexes created or rebuilt"""
+    ensure_tables(conn)
+    return ensure_indexes(conn)
+
+def full_scans(conn, sql, params, allowed=()):
+    """(plan detail lines, offending lines) for one query; table scans and automatic indexes offend"""
+    plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+    offending = []
+    for detail in plan:
+        scan = re.match(r'SCAN (\S+)', detail)
+        if scan and 'VIRTUAL TABLE' not in detail and scan.group(1) not in allowed:
+            offending.append(detail)
+        elif 'AUTOMATIC' in detail:
+            offending.append(detail)  # an index built for this one query, i.e. a scan
+    return plan, offending
+
+def check_plans(conn, verbose=False):
+    """Print each hot query's plan verdict; returns the number of queries with a full scan"""
+    failures = 0
+    for name, sql, params, allowed in HOT_QUERIES:
+        plan, offending = full_scans(conn, sql, params, allowed)
+        if offending:
+            failures += 1
+            print(f"❌ {name}: {'; '.join(offending)}")
+        else:
+            print(f"✅ {name}" + (f": {'; '.join(plan)}" if verbose else ''))
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Create SkillSwapping tables and indexes, and check hot query plans')
+    parser.add_argument('--db', help='database to apply to (default: app.db; --check alone uses a scratch database)')
+    parser.add_argument('--check', action='store_true', help='exit 1 if a hot query plans a full scan')
+    parser.add_argument('--verbose', action='store_true', help='print every plan, not just failures')
+    args = parser.parse_args()
+
+    if args.check and not args.db:
+        conn = sqlite3.connect(':memory:')
+    else:
+        conn = get_connection(args.db or DB_PATH)
+    with conn:
+        changed = ensure_schema(conn)
+    for name in changed:
+        print(f"🔧 Created index {name}")
+    if not args.check:
+        print(f"✅ Schema up to date ({len(INDEXES)} managed indexes)")
+        return
+
+    failures = check_plans(conn, args.verbose)
+    if failures:
+        print(f"\n{failures} hot queries scan a whole table; add or fix an index in schema.INDEXES")
+        sys.exit(1)
+    print(f"\n✅ All {len(HOT_QUERIES)} hot queries use indexes")
+
+if __name__ == '__main__':
+    main()
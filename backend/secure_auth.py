@@ -3,67 +3,70 @@
 Secure authentication implementation for SkillSwapping
 """
 
-import bcrypt
 import secrets
 import sqlite3
 import os
 from datetime import datetime, timedelta
+from db import DB_PATH, get_connection
+from match_graph import match_graph
+from match_users import invalidate_user_skills
+from password_hasher import password_hasher, HasherBusyError
+from session_cache import session_cache
+from change_feed import change_feed, bump_generation
+from skill_store import sync_user_skills
+from schema import ensure_schema
+from metrics import timed, time_operation
+from session_expiry import get_expiry_scheduler
 
 class SecureAuth:
     def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(__file__), 'app.db')
+        self.db_path = DB_PATH
         self._ensure_sessions_table()
     
     def _ensure_sessions_table(self):
-        """Ensure the sessions table exists"""
-        with sqlite3.connect(self.db_path) as conn:
-            # Create sessions table if it doesn't exist
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS user_sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    session_token TEXT UNIQUE NOT NULL,
-                    login_time DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    last_activity DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    is_active BOOLEAN DEFAULT 1,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            
-            # Add missing columns to users table if they don't exist
-            try:
-                conn.execute('ALTER TABLE users ADD COLUMN is_online BOOLEAN DEFAULT 0')
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            
-            try:
-                conn.execute('ALTER TABLE users ADD COLUMN last_login DATETIME')
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            
+        """Ensure the sessions table and the indexes its queries use exist"""
+        with get_connection(self.db_path) as conn:
+            # users/user_sessions columns, skill tables and indexes, see schema.py
+            ensure_schema(conn)
             conn.commit()
     
     def hash_password(self, password: str) -> str:
-        """Securely hash a password using bcrypt"""
-        # Generate a random salt and hash the password
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        """Securely hash a password using bcrypt (runs on the hasher pool)"""
+        return password_hasher.hash(password)
     
     def verify_password(self, password: str, hashed: str) -> bool:
-        """Verify a password against its hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        """Verify a password against its hash (runs on the hasher pool)"""
+        return password_hasher.verify(password, hashed)
+    
+    def _schedule_rehash(self, user_id: int, password: str, hashed: str):
+        """Re-hash a password stored at an old cost factor, in the background"""
+        if not password_hasher.needs_rehash(hashed):
+            return
+        future = password_hasher.submit_hash(password)
+        if future is None:
+            return  # Pool is busy, try again on a later login
+        
+        def store(done):
+            try:
+                with get_connection(self.db_path) as conn:
+                    # Only replace the hash we verified, never a newer password
+                    conn.execute('UPDATE users SET password = ? WHERE id = ? AND password = ?',
+                                 (done.result(), user_id, hashed))
+            except Exception as e:
+                print(f"Password rehash error: {e}")
+        future.add_done_callback(store)
     
     def generate_session_token(self) -> str:
         """Generate a cryptographically secure session token"""
         return secrets.token_urlsafe(32)
     
+    @timed('create_user')
     def create_user(self, username: str, password: str, **kwargs) -> dict:
         """Create a new user with secure password hashing"""
         hashed_password = self.hash_password(password)
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.execute('''
                     INSERT INTO users (username, password, first_name, last_name, 
                                      preferred_language, skills_have, skills_want, 
@@ -76,20 +79,59 @@ class SecureAuth:
                     kwargs.get('device_fingerprint'), datetime.now().isoformat()
                 ))
                 user_id = cursor.lastrowid
+                sync_user_skills(conn, user_id, kwargs.get('skills_have', ''), kwargs.get('skills_want', ''))
                 conn.commit()
                 
+                match_graph.update_user({
+                    'id': user_id,
+                    'skills_have': kwargs.get('skills_have', ''),
+                    'skills_want': kwargs.get('skills_want', ''),
+                    'preferred_language': kwargs.get('preferred_language')
+                })
+                change_feed.bump()
+                
                 return {'id': user_id, 'username': username, 'success': True}
         except sqlite3.IntegrityError:
             return {'error': 'Username already exists', 'success': False}
     
-    def authenticate_user(self, username: str, password: str) -> dict:
-        """Authenticate user with secure password verification"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+    def update_user_skills(self, user_id: int, skills_have: str = None,
+                           skills_want: str = None, preferred_language: str = None) -> dict:
+        """Update a user's skills or languages and refresh their match graph edges"""
+        with get_connection(self.db_path) as conn:
             user = conn.execute(
-                'SELECT * FROM users WHERE username = ?', (username,)
+                'SELECT id, skills_have, skills_want, preferred_language FROM users WHERE id = ?',
+                (user_id,)
             ).fetchone()
             
+            if not user:
+                return {'error': 'User not found', 'success': False}
+            
+            updated = {
+                'id': user_id,
+                'skills_have': user['skills_have'] if skills_have is None else skills_have,
+                'skills_want': user['skills_want'] if skills_want is None else skills_want,
+                'preferred_language': user['preferred_language'] if preferred_language is None else preferred_language
+            }
+            conn.execute('''
+                UPDATE users SET skills_have = ?, skills_want = ?, preferred_language = ? WHERE id = ?
+            ''', (updated['skills_have'], updated['skills_want'], updated['preferred_language'], user_id))
+            sync_user_skills(conn, user_id, updated['skills_have'], updated['skills_want'])
+            conn.commit()
+        
+        invalidate_user_skills(user_id)
+        match_graph.update_user(updated)
+        change_feed.bump()
+        return {'id': user_id, 'success': True}
+    
+    @timed('authenticate_user')
+    def authenticate_user(self, username: str, password: str) -> dict:
+        """Authenticate user with secure password verification"""
+        with get_connection(self.db_path) as conn:
+            with time_operation('auth_user_lookup'):
+                user = conn.execute(
+                    'SELECT * FROM users WHERE username = ?', (username,)
+                ).fetchone()
+            
             if not user:
                 return {'error': 'Invalid username or password', 'success': False}
             
@@ -97,10 +139,13 @@ class SecureAuth:
             try:
                 if self.verify_password(password, user['password']):
                     # First, deactivate any existing active sessions for this user
-                    conn.execute('''
+                    ended = conn.execute('''
                         UPDATE user_sessions SET is_active = 0 
                         WHERE user_id = ? AND is_active = 1
-                    ''', (user['id'],))
+                    ''', (user['id'],)).rowcount
+                    if ended:
+                        bump_generation(conn, 'revoked_sessions')  # other workers' caches
+                    session_cache.invalidate_user(user['id'])
                     
                     # Now create a new session
                     session_token = self.generate_session_token()
@@ -116,6 +161,9 @@ class SecureAuth:
                     ''', (datetime.now(), user['id']))
                     
                     conn.commit()
+                    change_feed.bump()
+                    get_expiry_scheduler(self.db_path).schedule(session_token)
+                    self._schedule_rehash(user['id'], password, user['password'])
                     
                     return {
                         'success': True,
@@ -129,6 +177,8 @@ class SecureAuth:
                     }
                 else:
                     return {'error': 'Invalid username or password', 'success': False}
+            except HasherBusyError:
+                raise
             except Exception as e:
                 print(f"Password verification error: {e}")
                 return {'error': 'Authentication failed', 'success': False}
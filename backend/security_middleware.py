@@ -3,22 +3,26 @@
 Security middleware and utilities for SkillSwapping
 """
 
-import time
-import sqlite3
 import hashlib
 import secrets
 from functools import wraps
 from flask import request, jsonify, g
 from datetime import datetime, timedelta
-from collections import defaultdict
+from db import get_connection
+from activity_buffer import get_activity_buffer
+from session_cache import session_cache
+from rate_limiter import make_limiter
+from error_handling import logger
 
 class SecurityMiddleware:
     """Security middleware for Flask application"""
     
     def __init__(self, app=None):
         self.app = app
-        self.rate_limits = defaultdict(list)
-        self.failed_attempts = defaultdict(list)
+        # Token buckets: constant memory per IP/username, idle keys dropped.
+        # RATE_LIMIT_BACKEND=sqlite shares them between gunicorn workers
+        self.rate_limits = make_limiter('requests')
+        self.failed_attempts = make_limiter('failed_logins')
         if app:
             self.init_app(app)
     
@@ -51,40 +55,16 @@ class SecurityMiddleware:
     
     def check_rate_limit(self, max_requests=100, window_minutes=15):
         """Check if request exceeds rate limit"""
-        client_ip = request.remote_addr
-        now = time.time()
-        window_start = now - (window_minutes * 60)
-        
-        # Clean old requests
-        self.rate_limits[client_ip] = [
-            timestamp for timestamp in self.rate_limits[client_ip]
-            if timestamp > window_start
-        ]
-        
-        # Check if limit exceeded
-        if len(self.rate_limits[client_ip]) >= max_requests:
-            return False
-        
-        # Add current request
-        self.rate_limits[client_ip].append(now)
-        return True
+        # Bursts of max_requests, refilling at max_requests per window
+        return self.rate_limits.allow(request.remote_addr, max_requests, window_minutes * 60)
     
     def check_login_attempts(self, username, max_attempts=5, window_minutes=30):
         """Check for brute force login attempts"""
-        now = time.time()
-        window_start = now - (window_minutes * 60)
-        
-        # Clean old attempts
-        self.failed_attempts[username] = [
-            timestamp for timestamp in self.failed_attempts[username]
-            if timestamp > window_start
-        ]
-        
-        return len(self.failed_attempts[username]) < max_attempts
+        return self.failed_attempts.remaining(username, max_attempts, window_minutes * 60) >= 1
     
-    def record_failed_login(self, username):
+    def record_failed_login(self, username, max_attempts=5, window_minutes=30):
         """Record a failed login attempt"""
-        self.failed_attempts[username].append(time.time())
+        self.failed_attempts.consume(username, max_attempts, window_minutes * 60)
     
     def validate_session(self):
         """Validate user session token"""
@@ -94,10 +74,12 @@ class SecurityMiddleware:
         
         token = auth_header[7:]  # Remove 'Bearer ' prefix
         
-        # Validate token in database
-        db_path = 'app.db'  # Adjust path as needed
-        with sqlite3.connect(db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        # Recently validated tokens skip the database unless a session was revoked since
+        session = session_cache.get(token)
+        if session is None:
+            # Validate token in database
+            conn = get_connection()
+            generation = session_cache.generation()  # read first: a revocation racing the query leaves the entry stale
             session = conn.execute('''
                 SELECT s.*, u.id as user_id, u.username 
                 FROM user_sessions s
@@ -106,18 +88,19 @@ class SecurityMiddleware:
             ''', (token, datetime.now())).fetchone()
             
             if session:
-                # Update last activity
-                conn.execute('''
-                    UPDATE user_sessions SET last_activity = ? WHERE id = ?
-                ''', (datetime.now(), session['id']))
-                conn.commit()
-                
-                # Store user info in request context
-                g.current_user = {
-                    'id': session['user_id'],
-                    'username': session['username']
-                }
-                return True
+                session_cache.put(token, session['id'], session['user_id'],
+                                  session['username'], session['expires_at'], generation)
+        
+        if session:
+            # Update last activity (buffered, written in batches)
+            get_activity_buffer().touch(token)
+            
+            # Store user info in request context
+            g.current_user = {
+                'id': session['user_id'],
+                'username': session['username']
+            }
+            return True
         
         return False
 
@@ -152,6 +135,9 @@ def hash_api_key(api_key):
     """Hash API key for secure storage"""
     return hashlib.sha256(api_key.encode()).hexdigest()
 
+# Queued like every other log record, so auditing never waits on the disk
+audit_logger = logger.getChild('audit')
+
 class AuditLogger:
     """Security audit logging"""
     
@@ -159,17 +145,20 @@ class AuditLogger:
     def log_login_attempt(username, success, ip_address):
         """Log login attempts"""
         status = "SUCCESS" if success else "FAILED"
-        print(f"[AUDIT] LOGIN {status}: {username} from {ip_address} at {datetime.now()}")
+        audit_logger.info(f"[AUDIT] LOGIN {status}: {username} from {ip_address}",
+                          extra={'event': 'login', 'success': success, 'username': username, 'remote_addr': ip_address})
     
     @staticmethod
     def log_user_creation(username, ip_address):
         """Log user creation"""
-        print(f"[AUDIT] USER_CREATED: {username} from {ip_address} at {datetime.now()}")
+        audit_logger.info(f"[AUDIT] USER_CREATED: {username} from {ip_address}",
+                          extra={'event': 'user_created', 'username': username, 'remote_addr': ip_address})
     
     @staticmethod
     def log_suspicious_activity(activity, details, ip_address):
         """Log suspicious activities"""
-        print(f"[AUDIT] SUSPICIOUS: {activity} - {details} from {ip_address} at {datetime.now()}")
+        audit_logger.warning(f"[AUDIT] SUSPICIOUS: {activity} - {details} from {ip_address}",
+                             extra={'event': 'suspicious', 'activity': activity, 'remote_addr': ip_address})
 
 if __name__ == '__main__':
     # Test security utilities
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Session token cache for SkillSwapping
+Bounded LRU of bearer token -> session details so validate_session can skip
+the user_sessions/users join. Revocations invalidate entries in this process
+explicitly and move the 'revoked_sessions' generation in the database, so a
+token ended by another worker stops working there on its next request too
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from db import get_connection
+from change_feed import read_generation
+
+MAX_CACHED_SESSIONS = 10000
+SESSION_CACHE_TTL_SECONDS = 60  # bounds staleness of the cached username; revocations don't wait for it
+
+def revocation_generation():
+    """Current 'revoked_sessions' generation of the default database"""
+    return read_generation(get_connection(), 'revoked_sessions')
+
+class SessionCache:
+    """LRU/TTL cache of token -> (session id, user id, username, expiry) with hit/miss counters
+
+    An entry is only served while the revocation generation it was validated
+    under is still current; `generation` reads it (one primary key lookup)
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_SESSIONS, ttl_seconds=SESSION_CACHE_TTL_SECONDS,
+                 generation=revocation_generation):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = generation
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()        # token -> (session_id, user_id, username, expires_at, cached_until, generation)
+        self._user_tokens = defaultdict(set)  # user id -> cached tokens, for invalidate_user
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """Cached session dict for a token, or None if unknown, expired, stale or possibly revoked"""
+        generation = self.generation()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                session_id, user_id, username, expires_at, cached_until, cached_generation = entry
+                if (cached_generation == generation and time.monotonic() < cached_until
+                        and (expires_at is None or datetime.now() < expires_at)):
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return {'id': session_id, 'user_id': user_id, 'username': username,
+                            'expires_at': expires_at}
+                self._remove(token)
+            self.misses += 1
+            return None
+
+    def put(self, token, session_id, user_id, username, expires_at=None, generation=None):
+        """Cache a session that was just validated against the database
+
+        Pass the generation read before validating, so a revocation committed
+        in between leaves the entry stale instead of caching a revoked token
+        """
+        if expires_at is not None and not isinstance(expires_at, datetime):
+            expires_at = datetime.fromisoformat(str(expires_at))
+        if generation is None:
+            generation = self.generation()
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (session_id, user_id, username, expires_at,
+                                    time.monotonic() + self.ttl_seconds, generation)
+            self._user_tokens[user_id].add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, token):
+        """Drop a revoked token"""
+        with self._lock:
+            self._remove(token)
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token of a user"""
+        with self._lock:
+            for token in list(self._user_tokens.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self):
+        """Drop everything"""
+        with self._lock:
+            self._entries.clear()
+            self._user_tokens.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+    def _remove(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._user_tokens.get(entry[1])
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._user_tokens[entry[1]]
+
+# Process-wide cache used by SecurityMiddleware and invalidated by session code
+session_cache = SessionCache()
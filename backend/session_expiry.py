@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Session expiry for SkillSwapping
+Idle sessions are expired with two set-based statements that read the
+(is_active, last_activity) index, so a sweep costs the number of expiring
+sessions rather than the size of user_sessions. A background scheduler keeps
+a min-heap of known deadlines and wakes when the earliest one passes
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from db import DB_PATH, get_connection
+from activity_buffer import get_activity_buffer
+from session_cache import session_cache
+from change_feed import change_feed, bump_generation
+from metrics import timed
+from schema import ensure_indexes
+
+SESSION_TIMEOUT_HOURS = float(os.environ.get('SESSION_TIMEOUT_HOURS', 24))
+EXPIRY_INTERVAL_SECONDS = float(os.environ.get('SESSION_EXPIRY_INTERVAL', 60))  # sweep at least this often
+
+_indexed = set()
+_indexed_lock = threading.Lock()
+
+def ensure_expiry_index(conn, db_path=DB_PATH):
+    """Create the indexes expiry sweeps range-scan (once per database per process)"""
+    with _indexed_lock:
+        if db_path in _indexed:
+            return
+        ensure_indexes(conn)
+        _indexed.add(db_path)
+
+def expire_sessions(conn, cutoff):
+    """Deactivate sessions idle since before cutoff and take users with no active session left offline
+
+    Runs inside the caller's transaction; returns (expired session tokens, users set offline)
+    """
+    expired = conn.execute('''
+        UPDATE user_sessions SET is_active = 0
+        WHERE is_active = 1 AND last_activity < ?
+        RETURNING user_id, session_token
+    ''', (cutoff,)).fetchall()
+    if not expired:
+        return [], 0
+    bump_generation(conn, 'revoked_sessions')  # cached tokens in every process
+
+    # One statement for every affected user; the NOT IN set is built once from the
+    # active end of the index rather than probed per user
+    user_ids = json.dumps(sorted({row[0] for row in expired}))
+    users_set_offline = conn.execute('''
+        UPDATE users SET is_online = 0
+        WHERE id IN (SELECT value FROM json_each(?))
+          AND is_online = 1
+          AND id NOT IN (SELECT user_id FROM user_sessions WHERE is_active = 1)
+    ''', (user_ids,)).rowcount
+    return [row[1] for row in expired], users_set_offline
+
+@timed('session_expiry')
+def expire_idle_sessions(db_path=None, max_idle=timedelta(hours=SESSION_TIMEOUT_HOURS), now=None):
+    """Expire sessions idle for longer than max_idle; returns the expired tokens and users set offline"""
+    db_path = db_path or DB_PATH
+    cutoff = (now or datetime.now()) - max_idle
+    get_activity_buffer(db_path).flush()  # don't expire sessions whose latest touch is still buffered
+    with get_connection(db_path) as conn:
+        ensure_expiry_index(conn, db_path)
+        tokens, users_set_offline = expire_sessions(conn, cutoff)
+
+    for token in tokens:
+        session_cache.invalidate(token)
+    if tokens:
+        change_feed.bump()
+    return {'tokens': tokens, 'deactivated_sessions': len(tokens), 'users_set_offline': users_set_offline}
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.min  # unreadable or missing activity: due now
+
+class SessionExpiryScheduler:
+    """Background thread expiring idle sessions at their deadlines
+
+    Deadlines (last_activity + max_idle) of sessions this process knows about sit
+    in a min-heap, so the thread sleeps until the earliest one instead of polling.
+    A heap entry is only a wake-up: the sweep itself is the indexed SQL, and due
+    sessions that turn out to have been touched since are pushed back with their
+    new deadline. It still sweeps every `interval` seconds to catch sessions
+    created by other processes; with use_heap=False that is all it does.
+    """
+
+    def __init__(self, db_path=None, max_idle=timedelta(hours=SESSION_TIMEOUT_HOURS),
+                 interval=EXPIRY_INTERVAL_SECONDS, use_heap=True):
+        self.db_path = db_path or DB_PATH
+        self.max_idle = max_idle
+        self.interval = interval
+        self.use_heap = use_heap
+        self.sweeps = 0
+        self.expired = 0
+        self._heap = []  # (deadline, session token)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._last_sweep = time.monotonic()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Load deadlines of the currently active sessions and start the thread"""
+        if self.running:
+            return self
+        if self.use_heap:
+            try:
+                conn = get_connection(self.db_path)
+                ensure_expiry_index(conn, self.db_path)
+                rows = conn.execute(
+                    'SELECT session_token, last_activity FROM user_sessions WHERE is_active = 1').fetchall()
+            except sqlite3.OperationalError as e:
+                print(f"Session expiry: {e}, nothing to schedule yet")  # fresh database, no sessions table
+                rows = []
+            with self._lock:
+                self._heap = [(_parse_time(row[1]) + self.max_idle, row[0]) for row in rows]
+                heapq.heapify(self._heap)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='session-expiry', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread after any sweep in progress"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def schedule(self, session_token, last_activity=None):
+        """Note a new or refreshed session; a no-op unless the scheduler is running with a heap"""
+        if not (self.use_heap and self.running):
+            return
+        deadline = _parse_time(last_activity or datetime.now()) + self.max_idle
+        with self._lock:
+            heapq.heappush(self._heap, (deadline, session_token))
+            earliest = self._heap[0][1] == session_token
+        if earliest:
+            self._wakeup.set()  # sleeping towards a later deadline
+
+    def pending(self):
+        """Number of deadlines in the heap"""
+        with self._lock:
+            return len(self._heap)
+
+    def run_once(self, now=None):
+        """Sweep now and reschedule due sessions that are still active; returns the sweep result"""
+        now = now or datetime.now()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[1])
+
+        result = expire_idle_sessions(self.db_path, self.max_idle, now)
+        self._last_sweep = time.monotonic()
+        self.sweeps += 1
+        self.expired += result['deactivated_sessions']
+
+        survivors = set(due) - set(result['tokens'])
+        if survivors:
+            rows = get_connection(self.db_path).execute('''
+                SELECT session_token, last_activity FROM user_sessions
+                WHERE session_token IN (SELECT value FROM json_each(?)) AND is_active = 1
+            ''', (json.dumps(sorted(survivors)),)).fetchall()
+            with self._lock:
+                for token, last_activity in rows:
+                    # Still active past its deadline (e.g. an odd timestamp format): look again next interval
+                    deadline = max(_parse_time(last_activity) + self.max_idle, now + timedelta(seconds=self.interval))
+                    heapq.heappush(self._heap, (deadline, token))
+        return result
+
+    def _seconds_until_next(self):
+        wait = self.interval - (time.monotonic() - self._last_sweep)
+        with self._lock:
+            if self._heap:
+                wait = min(wait, (self._heap[0][0] - datetime.now()).total_seconds())
+        return max(wait, 0)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if self._wakeup.wait(self._seconds_until_next()):
+                self._wakeup.clear()  # new earliest deadline or stop(): work out the wait again
+                continue
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error expiring sessions: {e}")
+                self._last_sweep = time.monotonic()  # retry on the next interval, not in a tight loop
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_expiry_scheduler(db_path=None):
+    """Shared scheduler for a database file (not started)"""
+    db_path = db_path or DB_PATH
+    with _schedulers_lock:
+        if db_path not in _schedulers:
+            _schedulers[db_path] = SessionExpiryScheduler(db_path)
+        return _schedulers[db_path]
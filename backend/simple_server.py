@@ -2,96 +2,528 @@
 """
 Simple HTTP server to serve the Marco page and API data
 """
+import argparse
+import errno
 import http.server
+import signal
 import socketserver
+import threading
+import time
 import json
-import sqlite3
 import os
-from urllib.parse import urlparse, parse_qs
+import re
+import selectors
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs, urlencode
+from match_graph import match_graph, matching_skills, common_languages
+from user_profiles import UserProfileManager
+from skill_store import ensure_skill_tables, sync_user_skills
+from db import DB_PATH, get_connection
+from metrics import REGISTRY, CONTENT_TYPE, observe_request, timed
+from user_queries import parse_user_filters, fetch_user_page, iter_user_batches, ndjson_chunks, json_array_chunks
+from change_feed import change_feed
+from dashboard_cache import DashboardSnapshotCache
+from dashboard_stream import DashboardStreamHub
+from password_hasher import HasherBusyError
+from session_expiry import get_expiry_scheduler
+from schema import ensure_schema
+from static_cache import (AssetCache, ENCODINGS, is_compressible, negotiate_encoding,
+                          not_modified_since, precompressed_file)
+
+FRONTEND_DIR = '/Users/karthikreddy/Documents/project/skillswapping/frontend'
+USER_MATCHES_PATH = re.compile(r'^/api/users/(\d+)/matches$')
+MAX_MATCH_LIMIT = 100
+USER_LIST_COLUMNS = ('id', 'username', 'first_name', 'last_name', 'preferred_language',
+                     'skills_have', 'skills_want', 'created_at', 'is_online', 'last_login')
+KEEP_ALIVE_TIMEOUT = 15      # idle keep-alive connections, and clients stalled mid-request
+MAX_IDLE_CONNECTIONS = 1024  # parked keep-alive connections; the longest idle is closed beyond this
+DEFAULT_WORKERS = 16
+SENDFILE_MIN_BYTES = 64 * 1024  # smaller static files go through SimpleHTTPRequestHandler
+
+# HTML and JS served from memory; --dev re-checks files on every request
+asset_cache = AssetCache()
+
+class StreamingServerMixin:
+    """Lets a handler hand its socket to someone else (the SSE hub) instead of having it closed"""
+    
+    def detach(self, request):
+        if not hasattr(self, '_detached'):
+            self._detached = set()
+        self._detached.add(request)
+    
+    def shutdown_request(self, request):
+        detached = getattr(self, '_detached', set())
+        if request in detached:
+            detached.discard(request)
+            return
+        super().shutdown_request(request)
+
+class ThreadPoolHTTPServer(StreamingServerMixin, socketserver.TCPServer):
+    """TCPServer that hands each ready connection to a bounded pool of worker threads
+
+    A worker serves the requests a connection already has waiting, then gives
+    the connection back: idle keep-alive connections wait in a selector on one
+    watcher thread, not on a worker, and go back to the pool when the client
+    sends its next request. Idle ones are closed after KEEP_ALIVE_TIMEOUT, or
+    oldest first once more than max_idle are open
+    """
+    allow_reuse_address = True
+    
+    def __init__(self, server_address, handler_class, workers=DEFAULT_WORKERS, max_idle=MAX_IDLE_CONNECTIONS):
+        self.workers = workers
+        self.max_idle = max_idle
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http-worker')
+        self._selector = selectors.DefaultSelector()
+        self._idle = {}      # parked socket -> time it went idle, oldest first; watcher thread only
+        self._returned = []  # (socket, client address) handed back by workers since the last wakeup
+        self._returned_lock = threading.Lock()
+        self._closing = False
+        self._wakeup_read, self._wakeup_write = socket.socketpair()
+        self._wakeup_read.setblocking(False)
+        self._wakeup_write.setblocking(False)
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ)
+        super().__init__(server_address, handler_class)
+        self._watcher = threading.Thread(target=self._watch_idle, name='http-keepalive', daemon=True)
+        self._watcher.start()
+    
+    def process_request(self, request, client_address):
+        # Connections beyond the pool size wait in the executor queue
+        self.executor.submit(self._process_request_thread, request, client_address)
+    
+    def finish_request(self, request, client_address):
+        """Serve the requests the connection has ready; True if it stays open for more"""
+        return not self.RequestHandlerClass(request, client_address, self).close_connection
+    
+    def _process_request_thread(self, request, client_address):
+        keep_alive = False
+        try:
+            keep_alive = self.finish_request(request, client_address)
+        except (ConnectionResetError, BrokenPipeError):
+            pass  # Client went away mid keep-alive
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            if keep_alive:
+                self._park(request, client_address)
+            else:
+                self.shutdown_request(request)
+    
+    def _park(self, request, client_address):
+        with self._returned_lock:
+            if self._closing:
+                closing = True
+            else:
+                closing = False
+                self._returned.append((request, client_address))
+        if closing:
+            self.shutdown_request(request)
+            return
+        try:
+            self._wakeup_write.send(b'\0')
+        except BlockingIOError:
+            pass  # a wakeup is already pending
+    
+    def _watch_idle(self):
+        while not self._closing:
+            timeout = KEEP_ALIVE_TIMEOUT
+            if self._idle:
+                timeout = max(next(iter(self._idle.values())) + KEEP_ALIVE_TIMEOUT - time.monotonic(), 0)
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj is self._wakeup_read:
+                    try:
+                        while self._wakeup_read.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                # The client sent its next request (or hung up): back to a worker
+                self._selector.unregister(key.fileobj)
+                del self._idle[key.fileobj]
+                self.process_request(key.fileobj, key.data)
+            
+            with self._returned_lock:
+                returned, self._returned = self._returned, []
+            now = time.monotonic()
+            for request, client_address in returned:
+                self._selector.register(request, selectors.EVENT_READ, client_address)
+                self._idle[request] = now
+            
+            # Dicts keep insertion order, so the longest idle come first
+            while self._idle:
+                request, since = next(iter(self._idle.items()))
+                if now - since < KEEP_ALIVE_TIMEOUT and len(self._idle) <= self.max_idle:
+                    break
+                self._selector.unregister(request)
+                del self._idle[request]
+                self.shutdown_request(request)
+    
+    def idle_connections(self):
+        """Number of keep-alive connections parked without a worker"""
+        return len(self._idle)
+    
+    def server_close(self):
+        super().server_close()
+        with self._returned_lock:
+            self._closing = True
+        try:
+            self._wakeup_write.send(b'\0')
+        except BlockingIOError:
+            pass
+        self._watcher.join()
+        for request in list(self._idle):
+            self._selector.unregister(request)
+            self.shutdown_request(request)
+        self._idle.clear()
+        # Let in-flight requests finish before the process exits
+        self.executor.shutdown(wait=True)
+        self._selector.close()
+        self._wakeup_read.close()
+        self._wakeup_write.close()
+
+class SingleThreadHTTPServer(StreamingServerMixin, socketserver.TCPServer):
+    """The original one-connection-at-a-time server"""
+    allow_reuse_address = True
+
+def make_server(mode, host, port, workers=DEFAULT_WORKERS):
+    """Server for the chosen mode; keep-alive is only enabled when connections can run concurrently"""
+    if mode == 'threaded':
+        SkillSwappingHandler.protocol_version = 'HTTP/1.1'
+        return ThreadPoolHTTPServer((host, port), SkillSwappingHandler, workers)
+    SkillSwappingHandler.protocol_version = 'HTTP/1.0'
+    return SingleThreadHTTPServer((host, port), SkillSwappingHandler)
+
+@timed('dashboard_build')
+def build_dashboard_data():
+    """Users, active users, mutual/one-way matches and stats for the live dashboard"""
+    # Connect to database
+    conn = get_connection(DB_PATH)
+    
+    # Get users with session info
+    users = conn.execute('''
+        SELECT u.id, u.username, u.first_name, u.last_name, u.preferred_language, 
+               u.skills_have, u.skills_want, u.created_at, u.is_online, u.last_login,
+               s.last_activity
+        FROM users u
+        LEFT JOIN user_sessions s ON u.id = s.user_id AND s.is_active = 1
+        ORDER BY u.is_online DESC, s.last_activity DESC, u.id
+    ''').fetchall()
+    
+    dashboard_data = {
+        'users': [],
+        'active_users': [],
+        'matches': {
+            'mutual': [],
+            'one_way': []
+        },
+        'stats': {
+            'total_users': 0,
+            'active_users': 0,
+            'live_matches': 0,
+            'total_opportunities': 0
+        }
+    }
+    
+    # Process users
+    for user in users:
+        user_dict = dict(user)
+        dashboard_data['users'].append(user_dict)
+        
+        if user_dict['is_online']:
+            dashboard_data['active_users'].append(user_dict)
+    
+    # Read matches from the incrementally maintained match graph
+    all_users = dashboard_data['users']
+    match_graph.sync(all_users)
+    
+    for user_a, user_b, a_teaches_b, b_teaches_a in match_graph.pairs(all_users):
+        both_online = user_a.get('is_online', 0) and user_b.get('is_online', 0)
+        
+        if a_teaches_b and b_teaches_a:
+            # Mutual match
+            dashboard_data['matches']['mutual'].append({
+                'user_a': user_a,
+                'user_b': user_b,
+                'a_teaches': a_teaches_b['skills'],
+                'b_teaches': b_teaches_a['skills'],
+                'languages': a_teaches_b['languages'],
+                'both_online': both_online
+            })
+        elif a_teaches_b:
+            dashboard_data['matches']['one_way'].append({
+                'teacher': user_a,
+                'student': user_b,
+                'skills': a_teaches_b['skills'],
+                'languages': a_teaches_b['languages'],
+                'both_online': both_online
+            })
+        else:
+            dashboard_data['matches']['one_way'].append({
+                'teacher': user_b,
+                'student': user_a,
+                'skills': b_teaches_a['skills'],
+                'languages': b_teaches_a['languages'],
+                'both_online': both_online
+            })
+    
+    # Calculate stats
+    dashboard_data['stats']['total_users'] = len(all_users)
+    dashboard_data['stats']['active_users'] = len(dashboard_data['active_users'])
+    
+    live_mutual = len([m for m in dashboard_data['matches']['mutual'] if m['both_online']])
+    live_one_way = len([m for m in dashboard_data['matches']['one_way'] if m['both_online']])
+    
+    dashboard_data['stats']['live_matches'] = live_mutual
+    dashboard_data['stats']['total_opportunities'] = live_mutual + live_one_way
+    return dashboard_data
+
+# Serialized dashboard, rebuilt once per change no matter how many pollers ask
+dashboard_cache = DashboardSnapshotCache(build_dashboard_data)
+
+# Pushes dashboard deltas to /api/dashboard/stream subscribers, built from the same snapshot
+dashboard_hub = DashboardStreamHub(lambda: dashboard_cache.get()[2])
+REGISTRY.gauge('skillswapping_dashboard_stream_clients', 'Connected /api/dashboard/stream clients').set_function(dashboard_hub.client_count)
+
+API_ROUTES = ('/api/users', '/api/login', '/api/dashboard', '/api/dashboard/stream', '/metrics')
+
+def route_label(path):
+    """Route name for metrics: fixed for API paths, with ids and static file names collapsed"""
+    if path in API_ROUTES:
+        return path
+    if USER_MATCHES_PATH.match(path):
+        return '/api/users/<id>/matches'
+    return 'other_api' if path.startswith('/api/') else 'static'
 
 class SkillSwappingHandler(http.server.SimpleHTTPRequestHandler):
+    # Clients stalled mid-request are dropped after this many seconds
+    timeout = KEEP_ALIVE_TIMEOUT
+    
     def __init__(self, *args, **kwargs):
         # Set the directory to serve files from
-        self.directory = '/Users/karthikreddy/Documents/project/skillswapping/frontend'
+        self.directory = FRONTEND_DIR
         super().__init__(*args, directory=self.directory, **kwargs)
     
+    def handle(self):
+        """Serve requests while the next one is already waiting; an idle keep-alive connection goes back to the server"""
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self._request_pending():
+            self.handle_one_request()
+    
+    def _request_pending(self):
+        # Non-blocking peek: pipelined bytes already buffered, or data on the socket
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+    
+    def send_response(self, code, message=None):
+        self._has_content_length = False
+        self._status = code
+        super().send_response(code, message)
+    
+    def send_header(self, keyword, value):
+        if keyword.lower() in ('content-length', 'transfer-encoding'):
+            self._has_content_length = True
+        super().send_header(keyword, value)
+    
+    def end_headers(self):
+        # Without a length the client can only find the end of the body by EOF
+        if self.protocol_version == 'HTTP/1.1' and not getattr(self, '_has_content_length', True):
+            self.send_header('Connection', 'close')
+        super().end_headers()
+    
+    def send_json(self, status, payload, headers=None):
+        """Send a JSON response (an object, or bytes already serialized) with CORS and Content-Length headers"""
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_chunks(self, status, content_type, chunks, headers=None):
+        """Stream a body of unknown length: chunked on HTTP/1.1, else ended by closing the connection"""
+        chunked = self.protocol_version == 'HTTP/1.1' and self.request_version == 'HTTP/1.1'
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue  # an empty chunk would end the body
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+        except Exception as e:
+            # Headers are gone already; cutting the connection is the only error left to report
+            print(f"Error streaming response: {e}")
+            self.close_connection = True
+    
     def do_GET(self):
+        self.handle_timed(self.route_get)
+    
+    def do_POST(self):
+        self.handle_timed(self.route_post)
+    
+    def handle_timed(self, route):
+        """Run a request and record its latency and status per route"""
+        start = time.perf_counter()
+        self._status = None
+        try:
+            route()
+        finally:
+            observe_request('simple_server', self.command, route_label(urlparse(self.path).path),
+                            self._status or 500, time.perf_counter() - start)
+    
+    def route_get(self):
         parsed_path = urlparse(self.path)
         
         if parsed_path.path == '/api/users':
-            self.serve_api_users()
+            self.serve_api_users(parse_qs(parsed_path.query))
+        elif parsed_path.path == '/metrics':
+            self.serve_metrics()
         elif parsed_path.path == '/api/dashboard':
             self.serve_api_dashboard()
+        elif parsed_path.path == '/api/dashboard/stream':
+            self.serve_api_dashboard_stream()
+        elif USER_MATCHES_PATH.match(parsed_path.path):
+            user_id = int(USER_MATCHES_PATH.match(parsed_path.path).group(1))
+            self.serve_api_user_matches(user_id, parse_qs(parsed_path.query))
         else:
             # Serve static files with cache control for JS and HTML files
             if parsed_path.path.endswith('.js'):
                 self.serve_js_file()
             elif parsed_path.path.endswith('.html') or parsed_path.path == '/':
                 self.serve_html_file()
+            elif parsed_path.path.endswith('.css'):
+                self.serve_cached_file('text/css')
             else:
-                # Serve static files
-                super().do_GET()
+                # Serve static files, large ones zero-copy
+                full_path = self.translate_path(self.path)
+                if os.path.isfile(full_path) and os.path.getsize(full_path) >= SENDFILE_MIN_BYTES:
+                    self.send_file(full_path, self.guess_type(full_path))
+                else:
+                    super().do_GET()
+    
+    def serve_metrics(self):
+        """Prometheus text exposition of this process's metrics"""
+        body = REGISTRY.render()
+        self.send_response(200)
+        self.send_header('Content-type', CONTENT_TYPE)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
     
     def serve_html_file(self):
-        """Serve HTML files with no-cache headers"""
+        """Serve HTML files from the asset cache"""
+        self.serve_cached_file('text/html')
+    
+    def serve_js_file(self):
+        """Serve JavaScript files from the asset cache"""
+        self.serve_cached_file('application/javascript')
+    
+    def serve_cached_file(self, content_type):
+        """Serve a file from memory with ETag/Last-Modified, answering 304 when the client is current"""
         try:
-            # Get the file path - remove query parameters
-            parsed_path = urlparse(self.path)
-            file_path = parsed_path.path.lstrip('/')
-            if file_path == '' or file_path == '/':
-                file_path = 'index.html'
-            
-            full_path = os.path.join(self.directory, file_path)
+            # translate_path drops the query string and keeps the path inside the served directory
+            full_path = self.translate_path(self.path)
+            if os.path.isdir(full_path):
+                full_path = os.path.join(full_path, 'index.html')
+            
+            asset = asset_cache.get(full_path)
+            if asset is None:
+                if os.path.isfile(full_path):
+                    # Too big to keep in memory, send it from disk
+                    self.send_file(full_path, content_type)
+                else:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                return
             
-            if os.path.exists(full_path):
-                with open(full_path, 'r') as f:
-                    content = f.read()
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-                self.send_header('Pragma', 'no-cache')
-                self.send_header('Expires', '0')
-                self.end_headers()
-                
-                self.wfile.write(content.encode())
-            else:
-                self.send_response(404)
+            encoding = negotiate_encoding(self.headers.get('Accept-Encoding'), asset.variants)
+            body, etag = asset.representation(encoding)
+            
+            # no-cache: browsers keep the file but revalidate it, which is a cheap 304
+            if asset.not_modified(self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since'), encoding):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', asset.last_modified)
+                self.send_header('Cache-Control', 'no-cache')
+                if asset.variants:
+                    self.send_header('Vary', 'Accept-Encoding')
+                self.send_header('Content-Length', '0')
                 self.end_headers()
+                return
+            
+            self.send_response(200)
+            self.send_header('Content-type', content_type)
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if asset.variants:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', asset.last_modified)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            
+            if self.command != 'HEAD':
+                self.wfile.write(body)
         except Exception as e:
-            print(f"Error serving HTML file: {e}")
+            print(f"Error serving file: {e}")
             self.send_response(500)
+            self.send_header('Content-Length', '0')
             self.end_headers()
     
-    def serve_js_file(self):
-        """Serve JavaScript files with no-cache headers"""
-        try:
-            # Get the file path - remove query parameters
-            parsed_path = urlparse(self.path)
-            file_path = parsed_path.path.lstrip('/')
-            full_path = os.path.join(self.directory, file_path)
-            
-            if os.path.exists(full_path):
-                with open(full_path, 'r') as f:
-                    content = f.read()
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/javascript')
-                self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-                self.send_header('Pragma', 'no-cache')
-                self.send_header('Expires', '0')
-                self.end_headers()
-                
-                self.wfile.write(content.encode())
-            else:
-                self.send_response(404)
+    def send_file(self, full_path, content_type):
+        """Send a file straight from disk with sendfile, using a precompressed copy when there is one"""
+        encoding = None
+        send_path = full_path
+        if is_compressible(full_path):
+            available = {enc for enc, _ in ENCODINGS if precompressed_file(full_path, enc)}
+            encoding = negotiate_encoding(self.headers.get('Accept-Encoding'), available)
+            if encoding:
+                send_path = precompressed_file(full_path, encoding)
+        
+        with open(send_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            mtime = os.stat(full_path).st_mtime
+            last_modified = self.date_time_string(mtime)
+            if not_modified_since(self.headers.get('If-Modified-Since'), mtime) and not self.headers.get('If-None-Match'):
+                self.send_response(304)
+                self.send_header('Last-Modified', last_modified)
+                self.send_header('Content-Length', '0')
                 self.end_headers()
-        except Exception as e:
-            print(f"Error serving JS file: {e}")
-            self.send_response(500)
+                return
+            
+            self.send_response(200)
+            self.send_header('Content-type', content_type)
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if is_compressible(full_path):
+                self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', str(stat.st_size))
+            self.send_header('Last-Modified', last_modified)
             self.end_headers()
+            if self.command != 'HEAD':
+                # Headers are already on the socket (wfile is unbuffered); the kernel copies the body
+                self.connection.sendfile(f)
     
-    def do_POST(self):
+    def route_post(self):
         parsed_path = urlparse(self.path)
         
         if parsed_path.path == '/api/users':
@@ -100,6 +532,7 @@ class SkillSwappingHandler(http.server.SimpleHTTPRequestHandler):
             self.handle_user_login()
         else:
             self.send_response(404)
+            self.send_header('Content-Length', '0')
             self.end_headers()
     
     def do_OPTIONS(self):
@@ -108,6 +541,7 @@ class SkillSwappingHandler(http.server.SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def handle_user_registration(self):
@@ -118,61 +552,50 @@ class SkillSwappingHandler(http.server.SimpleHTTPRequestHandler):
             user_data = json.loads(post_data.decode('utf-8'))
             
             # Connect to database
-            db_path = '/Users/karthikreddy/Documents/project/skillswapping/backend/app.db'
-            conn = sqlite3.connect(db_path)
-            
-            # Check if username already exists
-            existing_user = conn.execute('SELECT id FROM users WHERE username = ?', (user_data['username'],)).fetchone()
-            if existing_user:
-                conn.close()
-                self.send_response(400)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                error_response = json.dumps({'error': 'Username already exists'})
-                self.wfile.write(error_response.encode())
-                return
-            
-            # Insert new user
-            cursor = conn.execute('''
-                INSERT INTO users (username, password, first_name, last_name, preferred_language, skills_have, skills_want)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                user_data['username'],
-                user_data['password'],  # Already hashed from frontend
-                user_data['firstName'],
-                user_data['lastName'],
-                user_data['preferredLanguage'],
-                ','.join(user_data['skillsHave']),
-                ','.join(user_data['skillsWant'])
-            ))
-            
-            user_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with get_connection(DB_PATH) as conn:
+                # Check if username already exists
+                existing_user = conn.execute('SELECT id FROM users WHERE username = ?', (user_data['username'],)).fetchone()
+                if existing_user:
+                    self.send_json(400, {'error': 'Username already exists'})
+                    return
+                
+                # Insert new user
+                cursor = conn.execute('''
+                    INSERT INTO users (username, password, first_name, last_name, preferred_language, skills_have, skills_want)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    user_data['username'],
+                    user_data['password'],  # Already hashed from frontend
+                    user_data['firstName'],
+                    user_data['lastName'],
+                    user_data['preferredLanguage'],
+                    ','.join(user_data['skillsHave']),
+                    ','.join(user_data['skillsWant'])
+                ))
+                
+                user_id = cursor.lastrowid
+                ensure_skill_tables(conn)
+                sync_user_skills(conn, user_id, ','.join(user_data['skillsHave']), ','.join(user_data['skillsWant']))
+            
+            match_graph.update_user({
+                'id': user_id,
+                'skills_have': ','.join(user_data['skillsHave']),
+                'skills_want': ','.join(user_data['skillsWant']),
+                'preferred_language': user_data['preferredLanguage']
+            })
+            change_feed.bump()
             
             # Send success response
-            self.send_response(201)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = json.dumps({
+            self.send_json(201, {
                 'success': True,
                 'userId': user_id,
                 'message': 'User registered successfully'
             })
-            self.wfile.write(response.encode())
             print(f"New user registered: {user_data['username']}")
             
         except Exception as e:
             print(f"Error in user registration: {e}")
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            error_response = json.dumps({'error': str(e)})
-            self.wfile.write(error_response.encode())
+            self.send_json(500, {'error': str(e)})
     
     def handle_user_login(self):
         try:
@@ -187,231 +610,156 @@ class SkillSwappingHandler(http.server.SimpleHTTPRequestHandler):
             from secure_auth import SecureAuth
             
             auth = SecureAuth()
-            result = auth.authenticate_user(login_data['username'], login_data['password'])
+            try:
+                result = auth.authenticate_user(login_data['username'], login_data['password'])
+            except HasherBusyError as e:
+                # Password pool is saturated, tell the client when to come back
+                self.send_json(503, {'error': str(e)}, {'Retry-After': str(e.retry_after)})
+                return
             
             if result['success']:
                 # Login successful
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                
-                response = json.dumps({
+                self.send_json(200, {
                     'success': True,
                     'user': result['user'],
                     'session_token': result['session_token']
                 })
-                self.wfile.write(response.encode())
                 print(f"User logged in via simple_server: {result['user']['username']}")
             else:
                 # Invalid credentials
-                self.send_response(401)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                error_response = json.dumps({'error': result['error']})
-                self.wfile.write(error_response.encode())
+                self.send_json(401, {'error': result['error']})
             
         except Exception as e:
             print(f"Error in user login: {e}")
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            error_response = json.dumps({'error': str(e)})
-            self.wfile.write(error_response.encode())
+            self.send_json(500, {'error': str(e)})
 
-    def serve_api_users(self):
+    def serve_api_users(self, query):
+        # ?limit=&after_id= pages in id order; is_online, skill, wants and language filter in SQL
+        try:
+            filters = parse_user_filters({name: values[0] for name, values in query.items()})
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        
+        headers = {
+            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type',
+            'Cache-Control': 'no-cache, no-store, must-revalidate',
+            'Pragma': 'no-cache',
+            'Expires': '0'
+        }
         try:
             # Connect to database
-            db_path = '/Users/karthikreddy/Documents/project/skillswapping/backend/app.db'
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row
+            conn = get_connection(DB_PATH)
             
-            # Get users
-            users = conn.execute('''
-                SELECT id, username, first_name, last_name, preferred_language, 
-                       skills_have, skills_want, created_at, is_online, last_login
-                FROM users
-            ''').fetchall()
-            
-            user_list = []
-            for user in users:
-                user_dict = dict(user)
-                # Convert skills from comma-separated strings to keep as strings for compatibility
-                user_list.append(user_dict)
+            if query.get('format', [''])[0] == 'ndjson':
+                # Export: rows go out as they're read, one JSON object per line
+                self.send_chunks(200, 'application/x-ndjson',
+                                 ndjson_chunks(iter_user_batches(conn, USER_LIST_COLUMNS, **filters)), headers)
+                print("Served API response: users as NDJSON")
+                return
             
-            conn.close()
+            limit = filters.pop('limit', None)
+            if limit is None:
+                # No page size: the whole (filtered) list, serialized batch by batch
+                self.send_chunks(200, 'application/json',
+                                 json_array_chunks(iter_user_batches(conn, USER_LIST_COLUMNS, **filters)), headers)
+                print("Served API response: all users")
+                return
             
-            # Send response with CORS headers
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-            self.send_header('Pragma', 'no-cache')
-            self.send_header('Expires', '0')
-            self.end_headers()
+            users, next_after_id = fetch_user_page(conn, USER_LIST_COLUMNS, limit, **filters)
+            if next_after_id is not None:
+                next_query = {name: values[0] for name, values in query.items()}
+                next_query['after_id'] = next_after_id
+                headers['X-Next-After-Id'] = str(next_after_id)
+                headers['Link'] = f'</api/users?{urlencode(next_query)}>; rel="next"'
             
-            response = json.dumps(user_list)
-            self.wfile.write(response.encode())
-            print(f"Served API response: {len(user_list)} users")
+            # Skills stay comma-separated strings for compatibility
+            self.send_json(200, [dict(user) for user in users], headers)
+            print(f"Served API response: {len(users)} users")
             
         except Exception as e:
             print(f"Error serving API: {e}")
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            error_response = json.dumps({'error': str(e)})
-            self.wfile.write(error_response.encode())
+            self.send_json(500, {'error': str(e)})
     
     def serve_api_dashboard(self):
         try:
-            # Connect to database
-            db_path = '/Users/karthikreddy/Documents/project/skillswapping/backend/app.db'
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row
-            
-            # Get users with session info
-            users = conn.execute('''
-                SELECT u.id, u.username, u.first_name, u.last_name, u.preferred_language, 
-                       u.skills_have, u.skills_want, u.created_at, u.is_online, u.last_login,
-                       s.last_activity
-                FROM users u
-                LEFT JOIN user_sessions s ON u.id = s.user_id AND s.is_active = 1
-                ORDER BY u.is_online DESC, s.last_activity DESC
-            ''').fetchall()
-            
-            dashboard_data = {
-                'users': [],
-                'active_users': [],
-                'matches': {
-                    'mutual': [],
-                    'one_way': []
-                },
-                'stats': {
-                    'total_users': 0,
-                    'active_users': 0,
-                    'live_matches': 0,
-                    'total_opportunities': 0
-                }
+            # Same bytes for every poller until users or sessions change
+            etag, body, dashboard_data = dashboard_cache.get()
+            headers = {
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type',
+                'ETag': etag,
+                'Cache-Control': 'no-cache'
             }
             
-            # Process users
-            for user in users:
-                user_dict = dict(user)
-                dashboard_data['users'].append(user_dict)
-                
-                if user_dict['is_online']:
-                    dashboard_data['active_users'].append(user_dict)
-            
-            # Calculate matches using simple skill matching
-            all_users = dashboard_data['users']
-            
-            # Find mutual matches
-            for i, user_a in enumerate(all_users):
-                for j, user_b in enumerate(all_users):
-                    if i >= j:  # Avoid duplicates
-                        continue
-                    
-                    # Check for skill matches
-                    a_can_teach_b = self.get_matching_skills(user_a.get('skills_have', ''), user_b.get('skills_want', ''))
-                    b_can_teach_a = self.get_matching_skills(user_b.get('skills_have', ''), user_a.get('skills_want', ''))
-                    
-                    # Check for common languages
-                    common_langs = self.get_common_languages(user_a.get('preferred_language', ''), user_b.get('preferred_language', ''))
-                    
-                    if a_can_teach_b and b_can_teach_a and common_langs:
-                        # Mutual match
-                        match = {
-                            'user_a': user_a,
-                            'user_b': user_b,
-                            'a_teaches': a_can_teach_b,
-                            'b_teaches': b_can_teach_a,
-                            'languages': common_langs,
-                            'both_online': user_a.get('is_online', 0) and user_b.get('is_online', 0)
-                        }
-                        dashboard_data['matches']['mutual'].append(match)
-                    elif (a_can_teach_b or b_can_teach_a) and common_langs:
-                        # One-way match
-                        if a_can_teach_b:
-                            one_way = {
-                                'teacher': user_a,
-                                'student': user_b,
-                                'skills': a_can_teach_b,
-                                'languages': common_langs,
-                                'both_online': user_a.get('is_online', 0) and user_b.get('is_online', 0)
-                            }
-                        else:
-                            one_way = {
-                                'teacher': user_b,
-                                'student': user_a,
-                                'skills': b_can_teach_a,
-                                'languages': common_langs,
-                                'both_online': user_a.get('is_online', 0) and user_b.get('is_online', 0)
-                            }
-                        dashboard_data['matches']['one_way'].append(one_way)
-            
-            # Calculate stats
-            dashboard_data['stats']['total_users'] = len(all_users)
-            dashboard_data['stats']['active_users'] = len(dashboard_data['active_users'])
-            
-            live_mutual = len([m for m in dashboard_data['matches']['mutual'] if m['both_online']])
-            live_one_way = len([m for m in dashboard_data['matches']['one_way'] if m['both_online']])
-            
-            dashboard_data['stats']['live_matches'] = live_mutual
-            dashboard_data['stats']['total_opportunities'] = live_mutual + live_one_way
-            
-            conn.close()
+            if_none_match = self.headers.get('If-None-Match')
+            if if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]:
+                self.send_response(304)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
             
             # Send response with CORS headers
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
-            response = json.dumps(dashboard_data)
-            self.wfile.write(response.encode())
+            self.send_json(200, body, headers)
             print(f"Served dashboard API: {dashboard_data['stats']['active_users']} active users, {dashboard_data['stats']['live_matches']} live matches")
             
         except Exception as e:
             print(f"Error serving dashboard API: {e}")
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
+            self.send_json(500, {'error': str(e)})
+    
+    def serve_api_dashboard_stream(self):
+        """Server-Sent Events: one dashboard snapshot, then only the changes"""
+        try:
+            self.send_response(200)
+            self.send_header('Content-type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
             self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('X-Accel-Buffering', 'no')  # don't let a proxy hold events back
             self.end_headers()
-            error_response = json.dumps({'error': str(e)})
-            self.wfile.write(error_response.encode())
+            self.wfile.flush()
+            self.close_connection = True
+            
+            # The hub writes to this socket from now on, so the worker thread is free again
+            if dashboard_hub.add_client(self.connection, self.headers.get('Last-Event-ID')):
+                self.server.detach(self.connection)
+                print(f"Dashboard stream opened: {dashboard_hub.client_count()} subscribers")
+        except Exception as e:
+            print(f"Error opening dashboard stream: {e}")
+    
+    def serve_api_user_matches(self, user_id, query):
+        """Top-K ranked matches for one user"""
+        try:
+            try:
+                limit = int(query.get('limit', ['20'])[0])
+            except ValueError:
+                limit = 0
+            
+            if not 1 <= limit <= MAX_MATCH_LIMIT:
+                status, payload = 400, {'error': f'limit must be an integer between 1 and {MAX_MATCH_LIMIT}'}
+            else:
+                profiles = UserProfileManager()
+                if not profiles.get_user_profile(user_id):
+                    status, payload = 404, {'error': 'User not found'}
+                else:
+                    status, payload = 200, {'user_id': user_id, 'matches': profiles.get_top_matches(user_id, limit)}
+            
+            self.send_json(status, payload)
+            
+        except Exception as e:
+            print(f"Error serving matches API: {e}")
+            self.send_json(500, {'error': str(e)})
     
     def get_matching_skills(self, teacher_skills, student_wants):
         """Find matching skills between teacher and student"""
-        if not teacher_skills or not student_wants:
-            return []
-        
-        teacher_array = [s.strip().lower() for s in teacher_skills.split(',') if s.strip()]
-        want_array = [s.strip().lower() for s in student_wants.split(',') if s.strip()]
-        
-        matches = []
-        for skill in teacher_array:
-            for want in want_array:
-                if skill in want or want in skill or skill == want:
-                    matches.append(skill)
-        
-        return list(set(matches))  # Remove duplicates
+        return matching_skills(teacher_skills, student_wants)
     
     def get_common_languages(self, lang1, lang2):
         """Find common languages between two users"""
-        if not lang1 or not lang2:
-            return []
-        
-        langs1 = [l.strip().lower() for l in lang1.split(',') if l.strip()]
-        langs2 = [l.strip().lower() for l in lang2.split(',') if l.strip()]
-        
-        return list(set(langs1) & set(langs2))
+        return common_languages(lang1, lang2)
     
     def do_OPTIONS(self):
         # Handle preflight CORS requests
@@ -419,14 +767,24 @@ class SkillSwappingHandler(http.server.SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
 if __name__ == '__main__':
-    PORT = 8001
-    HOST = "0.0.0.0"  # Listen on all network interfaces for mobile access
+    parser = argparse.ArgumentParser(description='SkillSwapping frontend and API server')
+    parser.add_argument('--mode', choices=['threaded', 'single'], default='threaded',
+                        help='threaded: bounded worker pool with keep-alive; single: one connection at a time')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='worker threads in threaded mode')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--host', default='0.0.0.0')  # Listen on all network interfaces for mobile access
+    parser.add_argument('--dev', action='store_true', help='pick up edits to HTML/JS files without a restart')
+    args = parser.parse_args()
+    asset_cache.dev_mode = args.dev
+    
+    PORT = args.port
+    HOST = args.host
     
     # Get current IP address dynamically
-    import socket
     try:
         # Connect to a remote server to determine local IP
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -437,42 +795,62 @@ if __name__ == '__main__':
         local_ip = "192.168.1.1"  # fallback
     
     print(f"Starting SkillSwapping server on {HOST}:{PORT}")
-    print(f"Serving files from: /Users/karthikreddy/Documents/project/skillswapping/frontend")
+    if args.mode == 'threaded':
+        print(f"Mode: threaded ({args.workers} workers, keep-alive {KEEP_ALIVE_TIMEOUT}s)")
+    else:
+        print("Mode: single (one connection at a time)")
+    print(f"Serving files from: {FRONTEND_DIR}")
+    print(f"Database: {DB_PATH}")
     print(f"Local access: http://127.0.0.1:{PORT}")
     print(f"Mobile/Network access: http://{local_ip}:{PORT}")
     print(f"API available at: /api/users")
     print(f"Dashboard API: /api/dashboard")
+    print(f"Dashboard stream (SSE): /api/dashboard/stream")
+    print(f"Matches API: /api/users/<id>/matches?limit=20")
     print(f"Marco page: /marco.html")
     print(f"Dashboard page: /dashboard.html")
     print("\nTo access from mobile device:")
     print(f"1. Make sure your mobile is on the same WiFi network")
     print(f"2. Open browser and go to: http://{local_ip}:{PORT}")
     
+    # Tables and the indexes the hot queries need, then background session expiry
+    with get_connection(DB_PATH) as conn:
+        for name in ensure_schema(conn):
+            print(f"Created index {name}")
+    expiry = get_expiry_scheduler(DB_PATH).start()
+    print(f"Session expiry: idle > {expiry.max_idle}, {expiry.pending()} active sessions scheduled")
+    
     # Try to start the server with retry logic
     max_retries = 3
     retry_delay = 2
     
     for attempt in range(max_retries):
         try:
-            with socketserver.TCPServer(("0.0.0.0", PORT), SkillSwappingHandler) as httpd:
+            with make_server(args.mode, HOST, PORT, args.workers) as httpd:
+                def stop(signum, frame):
+                    # shutdown() waits for serve_forever to return, so it can't run on this thread
+                    print("\nStopping server, finishing in-flight requests...")
+                    threading.Thread(target=httpd.shutdown, daemon=True).start()
+                signal.signal(signal.SIGTERM, stop)
+                
                 if attempt > 0:
                     print(f"✅ Server started successfully on attempt {attempt + 1}")
-                httpd.serve_forever()
+                try:
+                    httpd.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+                print("Server stopped")
                 break
         except OSError as e:
-            if e.errno == 48:  # Address already in use
+            if e.errno == errno.EADDRINUSE:  # Address already in use
                 if attempt < max_retries - 1:
                     print(f"⚠️  Port {PORT} is busy, retrying in {retry_delay} seconds... (attempt {attempt + 1}/{max_retries})")
-                    import time
                     time.sleep(retry_delay)
                 else:
                     print(f"❌ Failed to start server after {max_retries} attempts. Port {PORT} appears to be in use.")
-                    print("💡 Try running: lsof -i :8001 to see what's using the port")
-                    print("💡 Or try a different port by modifying PORT variable in this script")
+                    print(f"💡 Try running: lsof -i :{PORT} to see what's using the port")
+                    print("💡 Or try a different port with --port")
                     exit(1)
             else:
                 print(f"❌ Unexpected error: {e}")
                 exit(1)
-        except KeyboardInterrupt:
-            print("\nServer stopped")
-            break
\ No newline at end of file
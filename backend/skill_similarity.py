@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Shared skill similarity table for SkillSwapping
+Scores the distinct skill vocabulary once so matchers look pairs up instead of
+re-running string similarity for every pair of users
+"""
+
+import threading
+from fuzzywuzzy import fuzz
+
+def fuzzy_score(a, b):
+    """Fuzzy similarity used by match_users and user_profiles (0-100)"""
+    return max(fuzz.partial_ratio(a, b), fuzz.partial_ratio(b, a))
+
+def substring_score(a, b):
+    """Containment similarity used by the simple_server dashboard (0 or 100)"""
+    return 100 if a in b or b in a else 0
+
+class SkillSimilarity:
+    """Sparse (skill_a, skill_b) -> score table that grows as new skills appear"""
+
+    def __init__(self, scorer=fuzzy_score, min_score=0):
+        self.scorer = scorer
+        self.min_score = min_score  # pairs scoring below this are not stored
+        self.vocabulary = set()
+        self.scores = {}            # skill -> {other skill: score}
+        self._lock = threading.Lock()
+
+    def add(self, skill):
+        """Score a new skill against the existing vocabulary"""
+        if skill in self.vocabulary:
+            return
+        with self._lock:
+            if skill in self.vocabulary:
+                return
+            row = {}
+            for other in self.vocabulary:
+                score = self.scorer(skill, other)
+                if score >= self.min_score:
+                    row[other] = score
+                    self.scores[other][skill] = score
+            own_score = self.scorer(skill, skill)
+            if own_score >= self.min_score:
+                row[skill] = own_score
+            self.scores[skill] = row
+            self.vocabulary.add(skill)
+
+    def add_all(self, skills):
+        """Score every skill in an iterable"""
+        for skill in skills:
+            self.add(skill)
+
+    def export(self):
+        """Picklable copy of the table, e.g. to ship to worker processes"""
+        with self._lock:
+            return {skill: dict(row) for skill, row in self.scores.items()}
+
+    def load(self, scores):
+        """Merge a table produced by export()"""
+        with self._lock:
+            for skill, row in scores.items():
+                self.scores.setdefault(skill, {}).update(row)
+                self.vocabulary.add(skill)
+
+    def score(self, a, b):
+        """Similarity between two normalized skills (0 if below min_score)"""
+        self.add(a)
+        self.add(b)
+        return self.scores[a].get(b, 0)
+
+    def matches(self, a, b, threshold):
+        """True when two skills score at least the threshold"""
+        if threshold < self.min_score:
+            # Pairs this weak are not stored, fall back to scoring directly
+            return self.scorer(a, b) >= threshold
+        return self.score(a, b) >= threshold
+
+    def neighbors(self, skill, threshold):
+        """Known skills scoring at least the threshold against the given skill, with their scores"""
+        if threshold < self.min_score:
+            scores = {other: self.scorer(skill, other) for other in tuple(self.vocabulary)}
+            return {other: score for other, score in scores.items() if score >= threshold}
+        self.add(skill)
+        with self._lock:
+            return {other: score for other, score in self.scores[skill].items() if score >= threshold}
+
+# Shared tables, one per matching rule in use across the backend
+fuzzy_similarity = SkillSimilarity(fuzzy_score, min_score=50)
+substring_similarity = SkillSimilarity(substring_score, min_score=100)
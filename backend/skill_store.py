@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Normalized skill storage for SkillSwapping
+Keeps the skills/user_skills tables in sync with the comma-separated skill
+columns on users so exact matches can be found with an indexed SQL join
+"""
+
+from match_users import skill_keywords
+from change_feed import bump_generation
+
+def ensure_skill_tables(conn):
+    """Create the skills and user_skills tables and their indexes if missing"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS skills (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            category TEXT,
+            description TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_skills (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            skill_id INTEGER NOT NULL,
+            skill_type TEXT NOT NULL CHECK (skill_type IN ('have', 'want')),
+            proficiency_level INTEGER DEFAULT 1 CHECK (proficiency_level BETWEEN 1 AND 5),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY (skill_id) REFERENCES skills (id) ON DELETE CASCADE,
+            UNIQUE (user_id, skill_id, skill_type)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_skills_user_id ON user_skills (user_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_skills_skill_id ON user_skills (skill_id)')
+    # Covers the have/want join: seek by type and skill, read user ids from the index
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_skills_type_skill
+        ON user_skills (skill_type, skill_id, user_id)
+    ''')
+
+def get_skill_id(conn, name):
+    """Id of a normalized skill name, inserting it on first use"""
+    conn.execute('INSERT OR IGNORE INTO skills (name) VALUES (?)', (name,))
+    return conn.execute('SELECT id FROM skills WHERE name = ?', (name,)).fetchone()[0]
+
+def sync_user_skills(conn, user_id, skills_have, skills_want):
+    """Replace a user's user_skills rows; runs inside the caller's transaction
+
+    Every registration and skill edit goes through here, so it also moves the
+    'profiles' generation that caches of user rows are keyed on
+    """
+    bump_generation(conn, 'profiles')
+    conn.execute('DELETE FROM user_skills WHERE user_id = ?', (user_id,))
+    for skill_type, skill_str in (('have', skills_have), ('want', skills_want)):
+        for name in sorted(skill_keywords(skill_str or '')):
+            conn.execute('''
+                INSERT OR IGNORE INTO user_skills (user_id, skill_id, skill_type) VALUES (?, ?, ?)
+            ''', (user_id, get_skill_id(conn, name), skill_type))
+
+def backfill_user_skills(conn):
+    """Populate user_skills from the skill columns of every existing user"""
+    ensure_skill_tables(conn)
+    users = conn.execute('SELECT id, skills_have, skills_want FROM users').fetchall()
+    for user_id, skills_have, skills_want in users:
+        sync_user_skills(conn, user_id, skills_have, skills_want)
+    return len(users)
+
+def exact_skill_matches(conn, active_only=False):
+    """(teacher id, student id, skill name) for every exact have/want match, via the skill_id join"""
+    online_filter = '''
+        AND EXISTS (SELECT 1 FROM users t WHERE t.id = h.user_id AND t.is_online = 1)
+        AND EXISTS (SELECT 1 FROM users st WHERE st.id = w.user_id AND st.is_online = 1)
+    ''' if active_only else ''
+    return conn.execute(f'''
+        SELECT h.user_id, w.user_id, s.name
+        FROM user_skills h
+        JOIN user_skills w ON w.skill_type = 'want' AND w.skill_id = h.skill_id
+        JOIN skills s ON s.id = h.skill_id
+        WHERE h.skill_type = 'have' AND h.user_id != w.user_id
+        {online_filter}
+        ORDER BY h.user_id, w.user_id, s.name
+    ''').fetchall()
+
+if __name__ == '__main__':
+    import os
+    import sqlite3
+
+    db_path = os.path.join(os.path.dirname(__file__), 'app.db')
+    with sqlite3.connect(db_path) as conn:
+        count = backfill_user_skills(conn)
+        conn.commit()
+    print(f"Backfilled skills for {count} users")
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+In-memory static asset cache for SkillSwapping
+Holds file bytes and their gzip/brotli variants keyed on mtime and size with
+precomputed ETag and Last-Modified values, so repeat requests are answered
+from memory or with 304
+"""
+
+import gzip
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # gzip only
+
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+MAX_CACHED_FILE_BYTES = 2 * 1024 * 1024  # bigger files are streamed from disk instead
+COMPRESSIBLE_EXTENSIONS = ('.html', '.js', '.css', '.json', '.svg', '.txt', '.md')
+MIN_COMPRESS_BYTES = 512  # below this the headers cost more than compression saves
+
+# Preferred first; the on-disk suffix written by precompress()
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+def is_compressible(path):
+    """Text assets worth compressing"""
+    return path.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+
+def compress(body, encoding):
+    """Compressed bytes for an encoding, or None if it isn't available"""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9, mtime=0)  # mtime=0 keeps output reproducible
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(body, quality=11)
+    return None
+
+def negotiate_encoding(accept_encoding, available):
+    """Best encoding from available that the Accept-Encoding header allows, or None for identity"""
+    if not accept_encoding or not available:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    best = None
+    for encoding, _ in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if encoding in available and quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+def not_modified_since(if_modified_since, mtime):
+    """True when an If-Modified-Since header is at or after a file's mtime"""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return False
+    return int(mtime) <= since
+
+def precompressed_file(path, encoding):
+    """Path of an up-to-date .gz/.br file written next to the source by precompress(), or None"""
+    suffix = dict(ENCODINGS)[encoding]
+    try:
+        if os.stat(path + suffix).st_mtime >= os.stat(path).st_mtime:
+            return path + suffix
+    except OSError:
+        pass
+    return None
+
+class CachedAsset:
+    """File contents, their compressed variants and the validators sent with them"""
+    __slots__ = ('path', 'body', 'mtime', 'size', 'etag', 'last_modified', 'variants')
+
+    def __init__(self, path, body, mtime, size):
+        self.path = path
+        self.body = body
+        self.mtime = mtime
+        self.size = size
+        self.etag = '"%s"' % hashlib.sha1(body).hexdigest()  # strong: derived from the bytes
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.variants = {}  # encoding -> compressed bytes
+
+    def compress(self):
+        """Fill variants from precompressed files on disk, compressing in memory where missing"""
+        if not is_compressible(self.path) or self.size < MIN_COMPRESS_BYTES:
+            return
+        for encoding, _ in ENCODINGS:
+            on_disk = precompressed_file(self.path, encoding)
+            if on_disk:
+                with open(on_disk, 'rb') as f:
+                    body = f.read()
+            else:
+                body = compress(self.body, encoding)
+            if body is not None and len(body) < self.size:
+                self.variants[encoding] = body
+
+    def footprint(self):
+        """Bytes held in memory for this asset"""
+        return self.size + sum(len(body) for body in self.variants.values())
+
+    def representation(self, encoding=None):
+        """(body, etag) for an encoding; each encoding gets its own strong ETag"""
+        if encoding is None:
+            return self.body, self.etag
+        return self.variants[encoding], '%s-%s"' % (self.etag[:-1], encoding)
+
+    def not_modified(self, if_none_match=None, if_modified_since=None, encoding=None):
+        """True when the request's validators show the client already has this version"""
+        if if_none_match:
+            # If-None-Match wins over If-Modified-Since when both are sent
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or self.representation(encoding)[1] in tags
+        return not_modified_since(if_modified_since, self.mtime)
+
+class AssetCache:
+    """LRU of file path -> CachedAsset, reloaded when a file's mtime or size changes"""
+
+    def __init__(self, dev_mode=False, max_bytes=MAX_CACHE_BYTES, max_file_bytes=MAX_CACHED_FILE_BYTES):
+        self.dev_mode = dev_mode  # stat on every request so edits show up immediately
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.hits = 0
+        self.misses = 0
+        self._assets = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Cached asset for a file, loading it if needed; None if missing or too big to cache"""
+        with self._lock:
+            asset = self._assets.get(path)
+            if asset is not None and not self.dev_mode:
+                self._assets.move_to_end(path)
+                self.hits += 1
+                return asset
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.invalidate(path)
+            return None
+
+        if asset is not None and (asset.mtime, asset.size) == (stat.st_mtime, stat.st_size):
+            with self._lock:
+                self.hits += 1
+            return asset
+
+        if not os.path.isfile(path) or stat.st_size > self.max_file_bytes:
+            return None
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        asset = CachedAsset(path, body, stat.st_mtime, len(body))
+        asset.compress()
+
+        with self._lock:
+            self.misses += 1
+            self._store(asset)
+        return asset
+
+    def invalidate(self, path=None):
+        """Drop one file, or everything when no path is given"""
+        with self._lock:
+            if path is None:
+                self._assets.clear()
+                self._bytes = 0
+            else:
+                old = self._assets.pop(path, None)
+                if old is not None:
+                    self._bytes -= old.footprint()
+
+    def stats(self):
+        """Hit/miss counters and memory use"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'files': len(self._assets), 'bytes': self._bytes}
+
+    def _store(self, asset):
+        old = self._assets.pop(asset.path, None)
+        if old is not None:
+            self._bytes -= old.footprint()
+        self._assets[asset.path] = asset
+        self._bytes += asset.footprint()
+        while self._bytes > self.max_bytes and len(self._assets) > 1:
+            _, evicted = self._assets.popitem(last=False)
+            self._bytes -= evicted.footprint()
+
+def precompress(root):
+    """Write .gz (and .br when brotli is installed) next to every compressible file under root"""
+    written = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if not is_compressible(path) or os.path.getsize(path) < MIN_COMPRESS_BYTES:
+                continue
+            with open(path, 'rb') as f:
+                body = f.read()
+            for encoding, suffix in ENCODINGS:
+                if precompressed_file(path, encoding):
+                    continue  # already up to date
+                compressed = compress(body, encoding)
+                if compressed is not None and len(compressed) < len(body):
+                    with open(path + suffix, 'wb') as f:
+                        f.write(compressed)
+                    written += 1
+    return written
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'precompress':
+        print("Usage: python static_cache.py precompress [directory]")
+        sys.exit(1)
+
+    root = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend')
+    count = precompress(root)
+    print(f"✅ Wrote {count} precompressed files under {os.path.abspath(root)}")
+    if brotli is None:
+        print("💡 Install the brotli package to also write .br files")
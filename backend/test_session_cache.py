@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test that a session revoked by another process stops being served from this
+process's session cache
+
+    python -m pytest test_session_cache.py
+"""
+
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+from db import DB_PATH, get_connection
+from schema import ensure_schema
+from session_cache import SessionCache
+
+# conftest.py points SKILLSWAPPING_DB at a scratch database; never clear the real one
+assert DB_PATH == os.environ.get('SKILLSWAPPING_DB'), 'run with pytest so conftest.py sets up the scratch database'
+
+def test_logout_in_another_process_revokes_cached_token():
+    conn = get_connection()
+    with conn:
+        ensure_schema(conn)
+        user_id = conn.execute('''
+            INSERT INTO users (username, password) VALUES ('cache@example.com', 'x')
+            ON CONFLICT (username) DO UPDATE SET password = 'x' RETURNING id
+        ''').fetchone()[0]
+        conn.execute("DELETE FROM user_sessions WHERE session_token = 'cached-token'")
+        conn.execute("INSERT INTO user_sessions (user_id, session_token, is_active) VALUES (?, 'cached-token', 1)",
+                     (user_id,))
+
+    cache = SessionCache()
+    cache.put('cached-token', 1, user_id, 'cache@example.com', datetime.now() + timedelta(hours=1),
+              cache.generation())
+    assert cache.get('cached-token') is not None
+
+    # Another worker ends the session; nothing invalidates this process's cache directly
+    subprocess.run([sys.executable, '-c',
+                    "from session_manager import SessionManager; SessionManager().end_session('cached-token')"],
+                   check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert cache.get('cached-token') is None
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test that idle keep-alive connections don't hold simple_server's worker threads
+
+    python -m pytest test_simple_server.py
+"""
+
+import http.client
+import threading
+import time
+
+import simple_server
+
+def get(conn, path):
+    conn.request('GET', path)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+def test_idle_keep_alive_connections_leave_workers_free():
+    httpd = simple_server.make_server('threaded', '127.0.0.1', 0, 2)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    port = httpd.server_address[1]
+    idle = []
+    try:
+        # Far more open, idle keep-alive connections than workers
+        for _ in range(10):
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            assert get(conn, '/metrics') == 200
+            idle.append(conn)
+        deadline = time.monotonic() + 2
+        while httpd.idle_connections() < 10 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert httpd.idle_connections() == 10
+
+        # A new client is served right away, and parked connections still work
+        started = time.monotonic()
+        assert get(http.client.HTTPConnection('127.0.0.1', port, timeout=5), '/metrics') == 200
+        assert time.monotonic() - started < 1
+        assert get(idle[0], '/metrics') == 200
+    finally:
+        for conn in idle:
+            conn.close()
+        httpd.shutdown()
+        httpd.server_close()
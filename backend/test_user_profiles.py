@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the top-K match lookup: early termination returns exactly what a
+full scan does, and the shared user snapshot only reloads after profile edits
+
+    python -m pytest test_user_profiles.py
+"""
+
+import os
+import random
+
+from db import DB_PATH, get_connection
+from schema import ensure_schema
+from skill_store import sync_user_skills
+from change_feed import change_feed
+from user_profiles import UserProfileManager, UserSnapshot
+
+# conftest.py points SKILLSWAPPING_DB at a scratch database; never clear the real one
+assert DB_PATH == os.environ.get('SKILLSWAPPING_DB'), 'run with pytest so conftest.py sets up the scratch database'
+
+SKILLS = ['python', 'python3', 'javascript', 'guitar', 'bass guitar', 'cooking', 'spanish', 'photography', 'sql', 'design']
+
+def setup_users(count=400, seed=7):
+    """A seeded population, a third of it online, all speaking English; returns the user ids"""
+    rng = random.Random(seed)
+    conn = get_connection()
+    with conn:
+        ensure_schema(conn)
+        conn.execute('DELETE FROM user_skills')
+        conn.execute('DELETE FROM users')
+        for index in range(count):
+            have, want = ','.join(rng.sample(SKILLS, 2)), ','.join(rng.sample(SKILLS, 2))
+            user_id = conn.execute('''
+                INSERT INTO users (username, password, first_name, last_name, preferred_language,
+                                   skills_have, skills_want, is_online)
+                VALUES (?, 'x', 'Test', 'User', 'English', ?, ?, ?)
+            ''', (f'user{index}@example.com', have, want, int(rng.random() < 0.33))).lastrowid
+            sync_user_skills(conn, user_id, have, want)
+    return [row[0] for row in conn.execute('SELECT id FROM users ORDER BY id')]
+
+def test_top_matches_stop_early_with_the_full_scan_result():
+    user_ids = setup_users()
+    profiles = UserProfileManager()
+    scored_early = scored_full = 0
+    for user_id in user_ids[:40]:
+        profiles.candidates_scored = 0
+        full = profiles.get_top_matches(user_id, 5, early_stop=False)
+        scored_full += profiles.candidates_scored
+
+        profiles.candidates_scored = 0
+        assert profiles.get_top_matches(user_id, 5) == full, user_id
+        scored_early += profiles.candidates_scored
+    assert scored_early < scored_full / 2, (scored_early, scored_full)
+
+def test_snapshot_reloads_on_profile_edits_only():
+    user_ids = setup_users(count=20)
+    snapshot = UserSnapshot()
+    users_by_id, _ = snapshot.get()
+    assert snapshot.reloads == 1 and set(users_by_id) == set(user_ids)
+
+    # A login: the online set follows it, the profile snapshot doesn't reload
+    conn = get_connection()
+    with conn:
+        conn.execute('UPDATE users SET is_online = 0')
+        conn.execute('UPDATE users SET is_online = 1 WHERE id = ?', (user_ids[0],))
+    change_feed.bump()
+    snapshot.get()
+    assert snapshot.reloads == 1
+    assert snapshot.online_ids() == {user_ids[0]}
+
+    # A skill edit moves the profiles generation
+    with conn:
+        conn.execute("UPDATE users SET skills_have = 'sql' WHERE id = ?", (user_ids[1],))
+        sync_user_skills(conn, user_ids[1], 'sql', '')
+    users_by_id, _ = snapshot.get()
+    assert snapshot.reloads == 2 and users_by_id[user_ids[1]]['skills_have'] == 'sql'
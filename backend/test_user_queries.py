@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test that streamed /api/users responses fail with an error status, not a truncated 200
+Runs against a scratch database on both the Flask app and simple_server:
+
+    python -m pytest test_user_queries.py
+"""
+
+import http.client
+import os
+import threading
+
+import app as flask_app
+import simple_server
+from db import DB_PATH, get_connection
+
+# conftest.py points SKILLSWAPPING_DB at a scratch database; never clear the real one
+DB_FILE = DB_PATH
+assert DB_FILE == os.environ.get('SKILLSWAPPING_DB'), 'run with pytest so conftest.py sets up the scratch database'
+
+def setup_database():
+    """One user, then no user_skills table, so skill/wants filters fail in SQL"""
+    conn = get_connection(DB_FILE)
+    with conn:
+        conn.execute('DELETE FROM users')
+        conn.execute('''
+            INSERT INTO users (username, password, first_name, last_name, preferred_language, skills_have, skills_want)
+            VALUES ('alice@example.com', 'x', 'Alice', 'Smith', 'English', 'Python', 'Guitar')
+        ''')
+        conn.execute('DROP TABLE IF EXISTS user_skills')
+
+def restore_database():
+    from skill_store import ensure_skill_tables
+    conn = get_connection(DB_FILE)
+    with conn:
+        ensure_skill_tables(conn)
+
+def test_flask_failing_filter_is_not_200():
+    setup_database()
+    try:
+        client = flask_app.app.test_client()
+        for query in ('?skill=Python', '?skill=Python&format=ndjson'):
+            response = client.get('/api/users' + query)
+            assert response.status_code >= 500, (query, response.status_code)
+        assert client.get('/api/users').status_code == 200  # unfiltered still streams
+    finally:
+        restore_database()
+
+def test_simple_server_failing_filter_is_not_200():
+    setup_database()
+    httpd = simple_server.make_server('threaded', '127.0.0.1', 0, 2)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        for query in ('?wants=Guitar', '?wants=Guitar&format=ndjson'):
+            conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=10)
+            conn.request('GET', '/api/users' + query)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            assert response.status >= 500, (query, response.status)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        restore_database()
@@ -4,20 +4,138 @@ User Profiles with Active Status and Skill Matching
 Shows detailed user profiles with active status and who they can teach/learn from
 """
 
-import sqlite3
 import os
+import heapq
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from db import DB_PATH, get_connection
 from session_manager import SessionManager
-from match_users import get_users, skill_keywords, fuzzy_skill_match, parse_languages
+from match_users import get_users, get_skill_index, user_skills, fuzzy_skill_match, skills_match
+from skill_similarity import fuzzy_similarity
+from metrics import timed
+from change_feed import change_feed, read_generation
+from log_pipeline import quiet_worker_logging
+
+# Weights of the ranked match score, each component is normalized to 0..1
+MATCH_SCORE_WEIGHTS = {
+    'similarity': 0.4,  # best similarity among matched skills
+    'skills': 0.3,      # number of the target's skills matched, both directions
+    'languages': 0.15,  # number of shared languages
+    'online': 0.15      # other user is online now
+}
+MAX_SCORED_SKILLS = 5
+MAX_SCORED_LANGUAGES = 3
+
+def match_score(best_similarity, skill_count, language_count, is_online):
+    """Ranking score for a candidate match (0..1)"""
+    return (MATCH_SCORE_WEIGHTS['similarity'] * best_similarity / 100
+            + MATCH_SCORE_WEIGHTS['skills'] * min(skill_count, MAX_SCORED_SKILLS) / MAX_SCORED_SKILLS
+            + MATCH_SCORE_WEIGHTS['languages'] * min(language_count, MAX_SCORED_LANGUAGES) / MAX_SCORED_LANGUAGES
+            + MATCH_SCORE_WEIGHTS['online'] * (1 if is_online else 0))
+
+def mutual_match(user_a, user_b):
+    """Mutual exchange record for two users, or None if they can't teach each other"""
+    a_skills = user_skills(user_a)
+    b_skills = user_skills(user_b)
+    
+    common_langs = a_skills.languages & b_skills.languages
+    if not common_langs:
+        return None
+    
+    # Check if A can teach B AND B can teach A
+    a_teaches_b = fuzzy_skill_match(a_skills.have, b_skills.want)
+    if not a_teaches_b:
+        return None
+    b_teaches_a = fuzzy_skill_match(b_skills.have, a_skills.want)
+    
+    if a_teaches_b and b_teaches_a:
+        return {
+            'user_a': user_a,
+            'user_b': user_b,
+            'a_teaches': a_teaches_b,
+            'b_teaches': b_teaches_a,
+            'languages': list(common_langs),
+            'both_online': user_a.get('is_online', 0) and user_b.get('is_online', 0)
+        }
+    return None
+
+# Per-process state for the parallel mutual matcher, shipped once per worker
+_worker_users = []
+
+def _init_mutual_worker(users, similarity_scores):
+    global _worker_users
+    quiet_worker_logging()
+    _worker_users = users
+    fuzzy_similarity.load(similarity_scores)
+
+def _mutual_block(rows):
+    """Index pairs (i, j) of mutual matches whose first user is in the given rows"""
+    pairs = []
+    for i in rows:
+        user_a = _worker_users[i]
+        for j, user_b in enumerate(_worker_users):
+            if user_a['id'] >= user_b['id']:  # Avoid duplicates
+                continue
+            if mutual_match(user_a, user_b):
+                pairs.append((i, j))
+    return pairs
+
+class UserSnapshot:
+    """User rows by id and the skill index synced with them, reloaded only when a profile changes
+
+    Keyed on the 'profiles' generation, which registrations and skill edits
+    bump, so logins, logouts and activity flushes don't force a reload. Online
+    flags change on exactly those writes, so they are read separately (online_ids)
+    """
+
+    def __init__(self, db_path=None, feed=change_feed):
+        self.db_path = db_path or DB_PATH
+        self.feed = feed
+        self.reloads = 0
+        self._snapshot = None  # (generation, users by id, skill index)
+        self._online = None    # (feed version, ids of online users)
+        self._lock = threading.Lock()
+
+    def get(self):
+        """(users by id, skill index) for the current profiles generation"""
+        generation = read_generation(get_connection(self.db_path), 'profiles')
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == generation:
+            return snapshot[1:]
+
+        with self._lock:
+            snapshot = self._snapshot
+            generation = read_generation(get_connection(self.db_path), 'profiles')
+            if snapshot is None or snapshot[0] != generation:
+                users = get_users()
+                snapshot = (generation, {user['id']: user for user in users}, get_skill_index(users))
+                self._snapshot = snapshot
+                self.reloads += 1
+        return snapshot[1:]
+
+    def online_ids(self):
+        """Ids of the users online now, re-read only when the change feed moves"""
+        version = self.feed.poll()
+        online = self._online
+        if online is None or online[0] != version:
+            rows = get_connection(self.db_path).execute('SELECT id FROM users WHERE is_online = 1')
+            online = (version, frozenset(row[0] for row in rows))
+            self._online = online
+        return online[1]
+
+# Shared by every UserProfileManager, so per-request lookups skip reloading all users
+_user_snapshot = UserSnapshot()
 
 class UserProfileManager:
     def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(__file__), 'app.db')
+        self.db_path = DB_PATH
         self.session_manager = SessionManager()
+        self.candidates_scored = 0  # top-matches candidates scored, for checking early termination
     
     def get_user_profile(self, user_id):
         """Get detailed profile for a specific user"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.execute('''
             SELECT id, username, first_name, last_name, skills_have, skills_want, 
                    preferred_language, is_online, last_login, created_at
@@ -25,7 +143,6 @@ class UserProfileManager:
         ''', (user_id,))
         
         user = cursor.fetchone()
-        conn.close()
         
         if not user:
             return None
@@ -43,6 +160,7 @@ class UserProfileManager:
             'created_at': user[9]
         }
     
+    @timed('skill_matches_for_user')
     def get_skill_matches_for_user(self, user_id):
         """Get all users this user can teach and learn from"""
         users = get_users()
@@ -57,9 +175,7 @@ class UserProfileManager:
         if not target_user:
             return {'can_teach': [], 'can_learn_from': []}
         
-        target_have = skill_keywords(target_user.get('skills_have', ''))
-        target_want = skill_keywords(target_user.get('skills_want', ''))
-        target_langs = parse_languages(target_user.get('preferred_language', ''))
+        target = user_skills(target_user)
         
         can_teach = []  # Users this user can teach
         can_learn_from = []  # Users this user can learn from
@@ -68,17 +184,15 @@ class UserProfileManager:
             if other_user['id'] == user_id:
                 continue
             
-            other_have = skill_keywords(other_user.get('skills_have', ''))
-            other_want = skill_keywords(other_user.get('skills_want', ''))
-            other_langs = parse_languages(other_user.get('preferred_language', ''))
+            other = user_skills(other_user)
             
             # Check for common languages
-            common_langs = target_langs & other_langs
+            common_langs = target.languages & other.languages
             if not common_langs:
                 continue
             
             # Check if target user can teach other user
-            teach_skills = fuzzy_skill_match(target_have, other_want)
+            teach_skills = fuzzy_skill_match(target.have, other.want)
             if teach_skills:
                 can_teach.append({
                     'user': other_user,
@@ -88,7 +202,7 @@ class UserProfileManager:
                 })
             
             # Check if target user can learn from other user
-            learn_skills = fuzzy_skill_match(other_have, target_want)
+            learn_skills = fuzzy_skill_match(other.have, target.want)
             if learn_skills:
                 can_learn_from.append({
                     'user': other_user,
@@ -99,49 +213,132 @@ class UserProfileManager:
         
         return {'can_teach': can_teach, 'can_learn_from': can_learn_from}
     
-    def get_mutual_matches(self):
-        """Get pairs of users who can teach each other"""
-        users = get_users()
-        mutual_matches = []
-        processed_pairs = set()
+    @timed('top_matches')
+    def get_top_matches(self, user_id, limit=20, early_stop=True):
+        """Best `limit` users to teach or learn from, ranked by match_score
+
+        early_stop=False scores every candidate instead of stopping at the bound;
+        the result is the same, it is there to check that
+        """
+        if limit <= 0:
+            return []
+        conn = get_connection(self.db_path)
+        target_user = conn.execute('''
+            SELECT id, username, first_name, last_name, skills_have, skills_want, preferred_language, is_online
+            FROM users WHERE id = ?
+        ''', (user_id,)).fetchone()
+        if not target_user:
+            return []
         
-        for user_a in users:
-            for user_b in users:
-                if user_a['id'] >= user_b['id']:  # Avoid duplicates
-                    continue
+        # Candidates come from the shared snapshot, rebuilt only after a profile change
+        users_by_id, index = _user_snapshot.get()
+        online_ids = _user_snapshot.online_ids()
+        target = user_skills(dict(target_user))
+        
+        # Candidate buckets, most similar first: students wanting what the target has,
+        # teachers having what the target wants. Each bucket is visited twice, online
+        # members first, under the best score any unseen member could still reach:
+        # matched skills are counted on the target's side and languages must be the
+        # target's, so both are capped by what the target lists
+        skill_cap = len(target.have) + len(target.want)
+        language_cap = len(target.languages)
+        buckets = []
+        for have in target.have:
+            for want, similarity in index.neighbors(have).items():
+                buckets.append((similarity, index.want.get(want, ())))
+        for want in target.want:
+            for have, similarity in index.neighbors(want).items():
+                buckets.append((similarity, index.have.get(have, ())))
+        passes = [(match_score(similarity, skill_cap, language_cap, online), online, bucket)
+                  for similarity, bucket in buckets for online in (True, False)]
+        passes.sort(key=lambda entry: entry[0], reverse=True)
+        
+        heap = []  # (score, -user id, match) with the weakest match on top
+        seen = {user_id}
+        for best_possible, online, bucket in passes:
+            # Nobody not yet seen can beat this bound (a tie could still win on id), so stop
+            if early_stop and len(heap) == limit and heap[0][0] > best_possible:
+                break
+            
+            members = tuple(bucket)  # the shared index may be re-synced meanwhile
+            for other_id in (online_ids.intersection(members) if online else members):
+                if other_id in seen:
+                    continue  # includes this bucket's online members on the offline pass
+                seen.add(other_id)
                 
-                pair_key = tuple(sorted([user_a['id'], user_b['id']]))
-                if pair_key in processed_pairs:
+                other_user = users_by_id.get(other_id)
+                if other_user is None:
+                    continue  # indexed after this snapshot was taken
+                other = user_skills(other_user)
+                common_langs = target.languages & other.languages
+                if not common_langs:
                     continue
-                processed_pairs.add(pair_key)
                 
-                a_have = skill_keywords(user_a.get('skills_have', ''))
-                a_want = skill_keywords(user_a.get('skills_want', ''))
-                a_langs = parse_languages(user_a.get('preferred_language', ''))
+                teach = [(have, want) for have in target.have for want in other.want if skills_match(have, want)]
+                learn = [(have, want) for have in other.have for want in target.want if skills_match(have, want)]
+                if not teach and not learn:
+                    continue
+                self.candidates_scored += 1
                 
-                b_have = skill_keywords(user_b.get('skills_have', ''))
-                b_want = skill_keywords(user_b.get('skills_want', ''))
-                b_langs = parse_languages(user_b.get('preferred_language', ''))
+                best_similarity = max(fuzzy_similarity.score(have, want) for have, want in teach + learn)
+                is_online = int(other_id in online_ids)
+                score = match_score(best_similarity, len({have for have, _ in teach}) + len({want for _, want in learn}),
+                                    len(common_langs), is_online)
+                entry = (score, -other_id, {
+                    'user': {key: other_user[key] for key in
+                             ('id', 'username', 'first_name', 'last_name', 'preferred_language')},
+                    'score': round(score, 4),
+                    'can_teach': sorted({have for have, _ in teach}),
+                    'can_learn': sorted({have for have, _ in learn}),
+                    'languages': sorted(common_langs),
+                    'is_online': is_online
+                })
                 
-                common_langs = a_langs & b_langs
-                if not common_langs:
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+        
+        return [match for _, _, match in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+    
+    @timed('mutual_matches')
+    def get_mutual_matches(self, workers=None):
+        """Get pairs of users who can teach each other"""
+        users = get_users()
+        if workers and workers > 1 and len(users) > 1:
+            return self._get_mutual_matches_parallel(users, workers)
+        
+        mutual_matches = []
+        for user_a in users:
+            for user_b in users:
+                if user_a['id'] >= user_b['id']:  # Avoid duplicates
                     continue
                 
-                # Check if A can teach B AND B can teach A
-                a_teaches_b = fuzzy_skill_match(a_have, b_want)
-                b_teaches_a = fuzzy_skill_match(b_have, a_want)
-                
-                if a_teaches_b and b_teaches_a:
-                    mutual_matches.append({
-                        'user_a': user_a,
-                        'user_b': user_b,
-                        'a_teaches': a_teaches_b,
-                        'b_teaches': b_teaches_a,
-                        'languages': list(common_langs),
-                        'both_online': user_a.get('is_online', 0) and user_b.get('is_online', 0)
-                    })
+                match = mutual_match(user_a, user_b)
+                if match:
+                    mutual_matches.append(match)
         
         return mutual_matches
+    
+    def _get_mutual_matches_parallel(self, users, workers):
+        """Score blocks of the pair space on a process pool, same result as the serial path"""
+        # Score the whole vocabulary up front so workers never rescore skills
+        for user in users:
+            record = user_skills(user)
+            fuzzy_similarity.add_all(record.have | record.want)
+        
+        # Many small blocks keep workers busy as later rows get cheaper
+        block_size = max(1, len(users) // (workers * 8))
+        blocks = [range(start, min(start + block_size, len(users)))
+                  for start in range(0, len(users), block_size)]
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_mutual_worker,
+                                 initargs=(users, fuzzy_similarity.export())) as executor:
+            block_pairs = list(executor.map(_mutual_block, blocks))
+        
+        # Blocks come back in submission order, so pairs are already in serial order.
+        # Records are rebuilt here so set-ordered fields match this process exactly.
+        return [mutual_match(users[i], users[j]) for pairs in block_pairs for i, j in pairs]
 
 def show_user_profile(user_id):
     """Display detailed profile for a specific user"""
@@ -213,14 +410,14 @@ def show_all_profiles():
         show_user_profile(user['id'])
         print("\n" + "=" * 80 + "\n")
 
-def show_mutual_matches():
+def show_mutual_matches(workers=None):
     """Show users who can teach each other (mutual skill exchange)"""
     pm = UserProfileManager()
     
     # Clean up expired sessions
     pm.session_manager.cleanup_expired_sessions()
     
-    mutual_matches = pm.get_mutual_matches()
+    mutual_matches = pm.get_mutual_matches(workers=workers)
     
     print("🤝 MUTUAL SKILL EXCHANGES")
     print("=" * 80)
@@ -291,29 +488,50 @@ def show_active_profiles():
         show_user_profile(user['id'])
         print("\n" + "-" * 80 + "\n")
 
+def print_usage():
+    print("Usage:")
+    print("  python3 user_profiles.py all      - Show all user profiles")
+    print("  python3 user_profiles.py active   - Show active user profiles only")
+    print("  python3 user_profiles.py mutual   - Show mutual skill exchanges")
+    print("  python3 user_profiles.py user <id> - Show specific user profile")
+    print("  Add --workers N to compute mutual exchanges on N processes")
+
 if __name__ == '__main__':
     import sys
     
-    if len(sys.argv) > 1:
-        command = sys.argv[1].lower()
+    args = sys.argv[1:]
+    
+    # --workers N runs mutual matching on a process pool (--workers last: one per CPU)
+    workers = None
+    if '--workers' in args:
+        index = args.index('--workers')
+        if index + 1 == len(args):
+            workers = os.cpu_count()
+            del args[index]
+        elif args[index + 1].isdigit() and int(args[index + 1]) > 0:
+            workers = int(args[index + 1])
+            del args[index:index + 2]
+        else:
+            print(f"❌ --workers needs a positive number, got '{args[index + 1]}'")
+            print_usage()
+            sys.exit(1)
+    
+    if args:
+        command = args[0].lower()
         
         if command == "all":
             show_all_profiles()
         elif command == "active":
             show_active_profiles()
         elif command == "mutual":
-            show_mutual_matches()
-        elif command == "user" and len(sys.argv) > 2:
-            user_id = int(sys.argv[2])
+            show_mutual_matches(workers)
+        elif command == "user" and len(args) > 1 and args[1].isdigit():
+            user_id = int(args[1])
             show_user_profile(user_id)
         else:
-            print("Usage:")
-            print("  python3 user_profiles.py all      - Show all user profiles")
-            print("  python3 user_profiles.py active   - Show active user profiles only")
-            print("  python3 user_profiles.py mutual   - Show mutual skill exchanges")
-            print("  python3 user_profiles.py user <id> - Show specific user profile")
+            print_usage()
     else:
         # Default: show active profiles and mutual matches
         show_active_profiles()
         print("\n")
-        show_mutual_matches()
\ No newline at end of file
+        show_mutual_matches(workers)
\ No newline at end of file
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+User listing queries for SkillSwapping
+Keyset pagination and is_online/skill/language filters pushed into SQL, plus
+row streaming (JSON array or NDJSON) straight off the cursor for exports
+"""
+
+import json
+
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500  # rows serialized per chunk when streaming
+
+def parse_user_filters(args):
+    """Validated filters from query-string values; raises ValueError with a message for the client"""
+    filters = {}
+    for name in ('after_id', 'limit'):
+        value = args.get(name)
+        if value in (None, ''):
+            continue
+        try:
+            filters[name] = int(value)
+        except ValueError:
+            raise ValueError(f'{name} must be an integer')
+
+    if filters.get('after_id', 0) < 0:
+        raise ValueError('after_id must not be negative')
+    if 'limit' in filters and not 1 <= filters['limit'] <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    is_online = args.get('is_online')
+    if is_online not in (None, ''):
+        if is_online.lower() in ('1', 'true', 'yes'):
+            filters['is_online'] = 1
+        elif is_online.lower() in ('0', 'false', 'no'):
+            filters['is_online'] = 0
+        else:
+            raise ValueError('is_online must be true or false')
+
+    # skill: users who have it, wants: users who want it, language: preferred languages
+    for name in ('skill', 'wants', 'language'):
+        value = (args.get(name) or '').strip().lower()
+        if value:
+            filters[name] = value
+    return filters
+
+def user_query(columns, after_id=None, limit=None, is_online=None, skill=None, wants=None, language=None):
+    """SELECT over users with the filters as WHERE clauses, in id order for keyset paging"""
+    where, params = [], []
+    if after_id is not None:
+        where.append('u.id > ?')
+        params.append(after_id)
+    if is_online is not None:
+        where.append('COALESCE(u.is_online, 0) = ?')
+        params.append(is_online)
+    for skill_type, name in (('have', skill), ('want', wants)):
+        if name:
+            # Seeks idx_user_skills_type_skill (skill_type, skill_id, user_id)
+            where.append('''EXISTS (
+                SELECT 1 FROM user_skills us JOIN skills s ON s.id = us.skill_id
+                WHERE s.name = ? AND us.skill_type = ? AND us.user_id = u.id
+            )''')
+            params.extend([name, skill_type])
+    if language:
+        where.append('has_keyword(u.preferred_language, ?)')
+        params.append(language)
+
+    sql = f"SELECT {', '.join('u.' + column for column in columns)} FROM users u"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY u.id'
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(limit)
+    return sql, params
+
+def fetch_user_page(conn, columns, limit, **filters):
+    """(rows, next after_id or None) for one page; columns must include id"""
+    rows = conn.execute(*user_query(columns, limit=limit + 1, **filters)).fetchall()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1]['id']
+    return rows, None
+
+def iter_user_batches(conn, columns, **filters):
+    """Lists of rows straight off the cursor, never holding the whole result
+
+    The query runs here, not on the first next(), so a bad filter or a locked
+    database raises before the caller has sent a 200 and its headers
+    """
+    cursor = conn.execute(*user_query(columns, **filters))
+    return _batches(cursor)
+
+def _batches(cursor):
+    while True:
+        rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+        if not rows:
+            return
+        yield rows
+
+def ndjson_chunks(batches, transform=dict):
+    """One JSON object per line, one encoded chunk per batch"""
+    for rows in batches:
+        yield ''.join(json.dumps(transform(row)) + '\n' for row in rows).encode()
+
+def json_array_chunks(batches, transform=dict):
+    """A JSON array written incrementally, one encoded chunk per batch"""
+    yield b'['
+    first = True
+    for rows in batches:
+        parts = [json.dumps(transform(row)) for row in rows]
+        yield (('' if first else ',') + ','.join(parts)).encode()
+        first = False
+    yield b']'
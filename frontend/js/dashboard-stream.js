@@ -0,0 +1,130 @@
+// SkillSwapping live dashboard stream (Server-Sent Events)
+// Keeps a local copy of the /api/dashboard payload: one snapshot, then deltas.
+// Falls back to the page's polling when EventSource or the stream is unavailable.
+
+class DashboardStream {
+    constructor(url, onUpdate, onFallback) {
+        this.url = url;
+        this.onUpdate = onUpdate;       // (data, changedEventTypes) after each batch of events
+        this.onFallback = onFallback;   // called once if streaming can't be used
+        this.source = null;
+        this.data = null;
+        this.pendingTypes = new Set();
+        this.renderTimer = null;
+        this.fellBack = false;
+    }
+
+    start() {
+        if (!window.EventSource) {
+            this.fallback();
+            return;
+        }
+
+        this.source = new EventSource(this.url);
+
+        this.source.addEventListener('snapshot', (event) => {
+            this.data = JSON.parse(event.data);
+            this.scheduleUpdate('snapshot');
+        });
+
+        DashboardStream.DELTA_EVENTS.forEach(type => {
+            this.source.addEventListener(type, (event) => {
+                if (!this.data) return;
+                this.apply(type, JSON.parse(event.data));
+                this.scheduleUpdate(type);
+            });
+        });
+
+        this.source.onerror = () => {
+            // CONNECTING means the browser is already retrying; CLOSED means the stream isn't served here
+            if (this.source.readyState === EventSource.CLOSED) {
+                this.fallback();
+            }
+        };
+    }
+
+    stop() {
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
+        clearTimeout(this.renderTimer);
+    }
+
+    fallback() {
+        this.stop();
+        if (!this.fellBack) {
+            this.fellBack = true;
+            console.log('Dashboard stream unavailable, falling back to polling');
+            this.onFallback();
+        }
+    }
+
+    scheduleUpdate(type) {
+        // Events from one change arrive together; render once per batch
+        this.pendingTypes.add(type);
+        clearTimeout(this.renderTimer);
+        this.renderTimer = setTimeout(() => {
+            const types = this.pendingTypes;
+            this.pendingTypes = new Set();
+            this.onUpdate(this.data, types);
+        }, 100);
+    }
+
+    apply(type, payload) {
+        const data = this.data;
+
+        switch (type) {
+            case 'user_added':
+            case 'user_online':
+                data.users = data.users.filter(user => user.id !== payload.id);
+                data.users.push(payload);
+                break;
+            case 'user_offline':
+                data.users.forEach(user => {
+                    if (user.id === payload.id) user.is_online = 0;
+                });
+                break;
+            case 'user_removed':
+                data.users = data.users.filter(user => user.id !== payload.id);
+                break;
+            case 'match_added':
+                data.matches[payload.kind] = data.matches[payload.kind]
+                    .filter(match => !DashboardStream.sameKey(payload.kind, match, payload.key));
+                data.matches[payload.kind].push(payload.match);
+                break;
+            case 'match_removed':
+                data.matches[payload.kind] = data.matches[payload.kind]
+                    .filter(match => !DashboardStream.sameKey(payload.kind, match, payload.key));
+                break;
+            case 'stats':
+                data.stats = payload;
+                break;
+        }
+
+        data.active_users = data.users.filter(user => user.is_online);
+    }
+
+    static sameKey(kind, match, key) {
+        if (kind === 'mutual') {
+            return match.user_a.id === key[0] && match.user_b.id === key[1];
+        }
+        return match.teacher.id === key[0] && match.student.id === key[1];
+    }
+
+    static uniqueUsers(users) {
+        // The dashboard lists a user once per active session; /api/users lists them once
+        const seen = new Set();
+        return users.filter(user => {
+            if (seen.has(user.id)) return false;
+            seen.add(user.id);
+            return true;
+        });
+    }
+}
+
+DashboardStream.DELTA_EVENTS = [
+    'user_added', 'user_online', 'user_offline', 'user_removed',
+    'match_added', 'match_removed', 'stats'
+];
+DashboardStream.USER_EVENTS = new Set(['snapshot', 'user_added', 'user_online', 'user_offline', 'user_removed']);
@@ -5,13 +5,14 @@ class DashboardManager {
         // Use relative URL so it works from any host (localhost, IP address, etc.)
         this.apiUrl = '/api';
         this.refreshInterval = null;
+        this.stream = null;
         this.currentUser = JSON.parse(localStorage.getItem('currentUser') || '{}');
         this.init();
     }
 
     init() {
         this.setupEventListeners();
-        this.loadDashboard();
+        this.showLoading();
         this.startAutoRefresh();
     }
 
@@ -23,7 +24,18 @@ class DashboardManager {
     }
 
     startAutoRefresh() {
-        // Auto-refresh every 30 seconds
+        // Live updates: a snapshot, then only changes pushed by the server
+        this.stream = new DashboardStream(
+            `${this.apiUrl}/dashboard/stream`,
+            (data) => this.displayDashboardData(data),
+            () => this.startPolling()
+        );
+        this.stream.start();
+    }
+
+    startPolling() {
+        // Fallback: auto-refresh every 30 seconds
+        this.loadDashboard(false);
         this.refreshInterval = setInterval(() => {
             this.loadDashboard(false); // Silent refresh
         }, 30000);
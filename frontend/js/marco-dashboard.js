@@ -5,13 +5,14 @@ class MarcoDashboardManager {
         // Use relative URL so it works from any host (localhost, IP address, etc.)
         this.apiUrl = '/api';
         this.refreshInterval = null;
+        this.stream = null;
         this.currentUser = JSON.parse(localStorage.getItem('currentUser') || '{}');
         this.init();
     }
 
     init() {
         this.setupEventListeners();
-        this.loadMarcoDashboard();
+        this.showLoading();
         this.startAutoRefresh();
     }
 
@@ -29,7 +30,22 @@ class MarcoDashboardManager {
     }
 
     startAutoRefresh() {
-        // Auto-refresh every 60 seconds for macro learning (less frequent than micro)
+        // Live updates from the dashboard stream; only user changes matter here
+        this.stream = new DashboardStream(
+            `${this.apiUrl}/dashboard/stream`,
+            (data, types) => {
+                if ([...types].some(type => DashboardStream.USER_EVENTS.has(type))) {
+                    this.displayMarcoDashboard(this.processMacroData(DashboardStream.uniqueUsers(data.users)));
+                }
+            },
+            () => this.startPolling()
+        );
+        this.stream.start();
+    }
+
+    startPolling() {
+        // Fallback: auto-refresh every 60 seconds for macro learning (less frequent than micro)
+        this.loadMarcoDashboard(false);
         this.refreshInterval = setInterval(() => {
             this.loadMarcoDashboard(false);
         }, 60000);
@@ -5,13 +5,14 @@ class MicroDashboardManager {
         // Use relative URL so it works from any host (localhost, IP address, etc.)
         this.apiUrl = '/api';
         this.refreshInterval = null;
+        this.stream = null;
         this.currentUser = JSON.parse(localStorage.getItem('currentUser') || '{}');
         this.init();
     }
 
     init() {
         this.setupEventListeners();
-        this.loadMicroDashboard();
+        this.showLoading();
         this.startAutoRefresh();
     }
 
@@ -31,7 +32,22 @@ class MicroDashboardManager {
     }
 
     startAutoRefresh() {
-        // Auto-refresh every 15 seconds for micro learning (more frequent)
+        // Live updates from the dashboard stream; only user changes matter here
+        this.stream = new DashboardStream(
+            `${this.apiUrl}/dashboard/stream`,
+            (data, types) => {
+                if ([...types].some(type => DashboardStream.USER_EVENTS.has(type))) {
+                    this.displayMicroDashboard(this.processMicroData(DashboardStream.uniqueUsers(data.users)));
+                }
+            },
+            () => this.startPolling()
+        );
+        this.stream.start();
+    }
+
+    startPolling() {
+        // Fallback: auto-refresh every 15 seconds for micro learning (more frequent)
+        this.loadMicroDashboard(false);
         this.refreshInterval = setInterval(() => {
             this.loadMicroDashboard(false);
         }, 15000);